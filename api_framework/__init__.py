@@ -12,12 +12,62 @@ class Settings(BaseSettings):
     title: str | None = "API Framework"
     description: str | None = "A API Framework for all API's"
     debug_mode: bool = False
+    error_log_interval: float = 60.0
     database_url: str = "test"
     database_password: str = "<PASSWORD>"
     database_default_schema: str = "common"
+    database_echo: bool = False
+    database_pool_size: int = 5
+    database_max_overflow: int = 10
+    database_pool_timeout: float = 30.0
+    database_pool_recycle: int = -1
+    database_pool_pre_ping: bool = False
+    database_slow_query_ms: float = 500.0
+    migrate_on_starting: bool = True
+    workers: int | None = None
+    gunicorn_bind: str = "0.0.0.0:9000"
+    gunicorn_backlog: int = 2048
+    gunicorn_preload_app: bool = False
+    gunicorn_max_requests: int = 0
+    gunicorn_max_requests_jitter: int = 0
+    gunicorn_timeout: int = 30
+    gunicorn_graceful_timeout: int = 30
+    gunicorn_keepalive: int = 5
+    worker_migrations: str = "verify"
+    readiness_cache_ttl: float = 5.0
+    readiness_timeout: float = 2.0
+    cache_backend: str = "memory"
+    cache_url: str | None = None
+    cache_password: str = ""
+    user_cache_max_size: int = 1024
+    user_cache_ttl: float = 30.0
+    default_response_class: str = "orjson"
+    server_timing: bool = True
+    metrics_enabled: bool = True
+    metrics_buckets: list[float] = [
+        0.005,
+        0.01,
+        0.025,
+        0.05,
+        0.1,
+        0.25,
+        0.5,
+        1.0,
+        2.5,
+        5.0,
+        10.0,
+    ]
+    default_page_size: int = 100
+    max_page_size: int = 1000
     api_log_type: str = "json"
     logger_name: str = "api-logger"
     log_level: str = "INFO"
+    log_bodies: bool = False
+    log_body_max_size: int = 2048
+    log_body_sample_rate: float = 1.0
+    log_queue: bool = False
+    log_queue_size: int = 10000
+    log_queue_policy: str = "drop"
     standard_log_format: str = "[%(asctime)s] [%(process)s] [%(name)s:%(module)s:%(funcName)s] [%(levelname)s]  %(message)s"
     json_log_format: str = """{
         "Name":            "name",
@@ -33,6 +83,10 @@ class Settings(BaseSettings):
         "Process":         "process",
         "Message":         "message"
     }"""
+    json_log_extra_fields: dict[str, str] = {
+        "RequestId": "request_id",
+        "TenantId": "tenant_id",
+    }
 
 
 @lru_cache
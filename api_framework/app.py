@@ -1,15 +1,26 @@
+import asyncio
 import logging
 from logging.config import dictConfig
-import traceback
 
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request, status
-from fastapi.responses import JSONResponse
 
 from api_framework import app_settings
-from api_framework.exceptions import ALL_EXCEPTIONS
-from api_framework.migrations.alembic_runner import upgrade
+from api_framework.exceptions import AppBaseError
+from api_framework.common.dependencies import async_mode, get_engine
+from api_framework.common.context import install_log_record_factory, request_id_var
+from api_framework.common.metrics import MetricsMiddleware, request_metrics
+from api_framework.common.middleware import (
+    AccessLogMiddleware,
+    RequestContextMiddleware,
+)
+from api_framework.common.errors import (
+    ErrorLogLimiter,
+    app_error_response,
+    unknown_error_response,
+)
+from api_framework.common.responses import get_default_response_class
 from api_framework.common.schemas import ValidationErrorSchema
 from api_framework.common.routers import router as common_router
 from api_framework.user.routers import router as user_router
@@ -18,13 +29,31 @@ from api_framework.logger_conf import log_config
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # downgrade()
-    # generate_revision(msg="enter Your message here")
-    upgrade()
+    # alembic is only imported when a worker starts, not with the app
+    from api_framework.migrations import alembic_runner
+
+    # alembic_runner.downgrade()
+    # alembic_runner.generate_revision(msg="enter Your message here")
+    # migrations run once before the workers start (gunicorn on_starting or
+    # api-framework-migrate), each worker only checks the schema is at head
+    mode = app_settings.worker_migrations
+    if mode == "upgrade":
+        await asyncio.to_thread(alembic_runner.upgrade)
+    elif mode == "verify" and not await asyncio.to_thread(alembic_runner.is_at_head):
+        raise RuntimeError("Database schema is not at head, run the migrations")
+    elif mode not in ("upgrade", "verify", "off"):
+        raise ValueError(f"{mode} is not a valid worker_migrations mode")
+    # the engine of the worker is created here rather than by its first request
+    engine = get_engine()
     yield
+    if async_mode:
+        await engine.dispose()
+    else:
+        engine.dispose()
 
 
 dictConfig(log_config)
+install_log_record_factory()
 
 app = FastAPI(
     openapi_url=f"{app_settings.base_url_prefix}/openapi.json",
@@ -40,10 +69,17 @@ app = FastAPI(
         }
     },
     lifespan=lifespan,
+    default_response_class=get_default_response_class(),
 )
 
 logger = logging.getLogger(app_settings.logger_name)
 
+app.add_middleware(AccessLogMiddleware)
+if request_metrics is not None:
+    app.add_middleware(MetricsMiddleware)
+# added last so it wraps the others, which then see the request context
+app.add_middleware(RequestContextMiddleware)
+
 logger.info("Register Routers")
 
 app.include_router(common_router, prefix=f"{app_settings.base_url_prefix}/common")
@@ -51,27 +87,23 @@ app.include_router(common_router, prefix=f"{app_settings.base_url_prefix}/common
 app.include_router(user_router, prefix=f"{app_settings.base_url_prefix}/user")
 
 
+error_log = ErrorLogLimiter(logger, interval=app_settings.error_log_interval)
+
+
+@app.exception_handler(AppBaseError)
+async def app_error_handler(request: Request, error: AppBaseError):
+    # known errors are handled inside the middlewares, so the access log and
+    # the request id header see the response, and log no traceback
+    error_log.log(error, exc_info=app_settings.debug_mode)
+    return app_error_response(error)
+
+
 @app.exception_handler(Exception)
-async def exception_handler(request: Request, error):
-    logger.debug(f"{request=}")
-    logger.error(msg="api error", exc_info=error)
-    if type(error).__name__ in ALL_EXCEPTIONS:
-        d = dict(
-            type=type(error).__name__,
-            code=error.code,
-            message=error.message,
-            http_code=error.http_code,
-        )
-        http_code = error.http_code
-    else:
-        d = {
-            "code": "api.error.999",
-            "type": type(error).__name__,
-            "message": str(error),
-            "traceback": traceback.format_exc(),
-        }
-        http_code = status.HTTP_500_INTERNAL_SERVER_ERROR
-    result = {"errors": [d]}
-    response = JSONResponse(result)
-    response.status_code = http_code
+async def exception_handler(request: Request, error: Exception):
+    logger.debug("request=%r", request)
+    error_log.log(error)
+    response = unknown_error_response(error)
+    # unhandled errors are answered outside of the request context middleware
+    if request_id := request_id_var.get():
+        response.headers["X-Request-ID"] = request_id
     return response
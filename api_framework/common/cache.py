@@ -0,0 +1,142 @@
+"""Read-through caches for hot database reads"""
+
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Protocol
+
+from api_framework import app_settings
+
+ALL_CACHES: Dict[str, "Cache"] = {}
+
+
+class Cache(ABC):
+    """Cache of JSON serializable values with hit/miss/eviction counters"""
+
+    def __init__(self, name: str, ttl: float):
+        self.name = name
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        ALL_CACHES[name] = self
+
+    async def get(self, key: str) -> Any | None:
+        value = await self._get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    @abstractmethod
+    async def _get(self, key: str) -> Any | None: ...
+
+    @abstractmethod
+    async def set(self, key: str, value: Any) -> None: ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None: ...
+
+    def stats(self) -> dict:
+        return dict(
+            name=self.name,
+            backend=type(self).__name__,
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+        )
+
+
+class LRUCache(Cache):
+    """In-process cache bounded by size and entry age"""
+
+    def __init__(self, name: str, ttl: float, max_size: int):
+        super().__init__(name=name, ttl=ttl)
+        self.max_size = max_size
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    async def _get(self, key: str) -> Any | None:
+        if (entry := self._entries.get(key)) is None:
+            return None
+        expires, value = entry
+        if expires < time.monotonic():
+            del self._entries[key]
+            self.evictions += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        return super().stats() | dict(size=len(self._entries), max_size=self.max_size)
+
+
+class CacheClient(Protocol):
+    """The subset of an async key/value client (e.g. ``redis.asyncio.Redis``)
+    used by the shared cache
+    """
+
+    async def get(self, name: str) -> bytes | None: ...
+
+    async def set(self, name: str, value: bytes, ex: int | None = None) -> Any: ...
+
+    async def delete(self, *names: str) -> Any: ...
+
+
+class SharedCache(Cache):
+    """Cache shared by all workers, expiry and eviction are left to the server"""
+
+    def __init__(self, name: str, ttl: float, client: CacheClient):
+        super().__init__(name=name, ttl=ttl)
+        self.client = client
+
+    def _key(self, key: str) -> str:
+        return f"{self.name}:{key}"
+
+    async def _get(self, key: str) -> Any | None:
+        value = await self.client.get(self._key(key))
+        return None if value is None else json.loads(value)
+
+    async def set(self, key: str, value: Any) -> None:
+        await self.client.set(
+            self._key(key), json.dumps(value).encode(), ex=max(int(self.ttl), 1)
+        )
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(self._key(key))
+
+
+def get_cache_url() -> str | None:
+    """``CACHE_URL`` with the ``{pswd}`` placeholder filled in from
+    ``CACHE_PASSWORD``, so the url can be shown without the password
+    """
+    if app_settings.cache_url is None:
+        return None
+    return app_settings.cache_url.format(pswd=app_settings.cache_password)
+
+
+def create_cache(name: str, ttl: float, max_size: int) -> Cache | None:
+    """Create the cache for the configured backend, or ``None`` when disabled"""
+    match app_settings.cache_backend:
+        case "none":
+            return None
+        case "memory":
+            return LRUCache(name=name, ttl=ttl, max_size=max_size)
+        case "redis":
+            # optional dependency, only needed for the shared backend
+            import redis.asyncio
+
+            client = redis.asyncio.from_url(get_cache_url())
+            return SharedCache(name=name, ttl=ttl, client=client)
+    raise ValueError(f"{app_settings.cache_backend} is not a valid cache backend")
@@ -0,0 +1,56 @@
+"""Request scoped context carried into every log record"""
+
+import logging
+from contextvars import ContextVar
+
+
+class QueryStats:
+    """Statements a request ran in the database and the time they took, with
+    the ASGI scope of the request to tell which route ran them
+    """
+
+    __slots__ = ("count", "duration", "scope")
+
+    def __init__(self, scope: dict | None = None):
+        self.count = 0
+        self.duration = 0.0
+        self.scope = scope
+
+    @property
+    def route(self) -> str | None:
+        """Method and path template of the route the request is bound to,
+        ``GET /user/{username}``, or its path until it is routed
+        """
+        if self.scope is None:
+            return None
+        route = self.scope.get("route")
+        path = route.path if route is not None else self.scope["path"]
+        return f"{self.scope['method']} {path}"
+
+
+request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
+tenant_id_var: ContextVar[str | None] = ContextVar("tenant_id", default=None)
+# the same object is shared by the threads and greenlets the request runs its
+# statements in, which only update it
+query_stats_var: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def install_log_record_factory() -> None:
+    """Stamp the request and tenant ids of the current context on each record.
+
+    The ids are read when the record is created, in the task of the request,
+    so a formatter running later or on another thread (``LOG_QUEUE``) still
+    sees them as plain record attributes.
+    """
+    factory = logging.getLogRecordFactory()
+    if getattr(factory, "request_context", False):
+        return
+
+    def record_factory(*args, **kwargs) -> logging.LogRecord:
+        record = factory(*args, **kwargs)
+        record.request_id = request_id_var.get()
+        record.tenant_id = tenant_id_var.get()
+        return record
+
+    record_factory.request_context = True
+    logging.setLogRecordFactory(record_factory)
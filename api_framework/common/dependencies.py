@@ -1,10 +1,19 @@
+import logging
+import os
+import time
+from functools import lru_cache
+
 from fastapi import Header
 
-# from sqlalchemy.ext.asyncio import create_async_engine, async_session
-from sqlalchemy import create_engine
+from sqlalchemy import Engine, create_engine, event, make_url, URL
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from api_framework import app_settings
+from api_framework.common.context import query_stats_var
+
+logger = logging.getLogger(f"{app_settings.logger_name}.database")
 
 
 class CommonHeaders:
@@ -17,16 +26,128 @@ class CommonHeaders:
         self.tenant_id = x_tenant_id
 
 
-# if "asyncpg" in app_settings.database_url:
-#     from sqlalchemy.ext.asyncio import create_async_engine, async_session
-#     engine = create_async_engine(database_url=app_settings.database_url)
-# else:
+def get_database_url(sync: bool = False) -> URL:
+    """Build the database URL from the settings.
+
+    When ``sync`` is set an async driver (e.g. asyncpg) is swapped for the
+    default sync driver of the same backend, which is what Alembic needs.
+    """
+    url = make_url(
+        app_settings.database_url.format(pswd=app_settings.database_password)
+    )
+    if sync and is_async_url(url):
+        url = url.set(drivername=url.get_backend_name())
+    return url
+
+
+def is_async_url(url: URL) -> bool:
+    return url.get_dialect().is_async
+
+
+def get_engine_options() -> dict:
+    return dict(
+        echo=app_settings.database_echo,
+        pool_size=app_settings.database_pool_size,
+        max_overflow=app_settings.database_max_overflow,
+        pool_timeout=app_settings.database_pool_timeout,
+        pool_recycle=app_settings.database_pool_recycle,
+        pool_pre_ping=app_settings.database_pool_pre_ping,
+    )
+
+
+database_url = get_database_url()
+async_mode = is_async_url(database_url)
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context.query_start = time.perf_counter()
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - context.query_start
+    stats = query_stats_var.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += duration
+    slow_query_ms = app_settings.database_slow_query_ms
+    if slow_query_ms and duration * 1000 >= slow_query_ms:
+        logger.warning(
+            "slow query %.2fms in %s: %s",
+            duration * 1000,
+            (stats and stats.route) or "no request",
+            statement,
+        )
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Count the statements of each request and the time they take in the
+    ``QueryStats`` of its context, and log the statements slower than
+    ``DATABASE_SLOW_QUERY_MS`` with the route that ran them
+    """
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
 
-engine = create_engine(
-    url=app_settings.database_url.format(pswd=app_settings.database_password), echo=True
-)
 
+@lru_cache
+def get_engine() -> Engine | AsyncEngine:
+    """Engine of this process, created on first use (or in the lifespan of the
+    app) instead of at import, which also loads the database driver
+    """
+    if async_mode:
+        engine = create_async_engine(url=database_url, **get_engine_options())
+        instrument_engine(engine.sync_engine)
+    else:
+        engine = create_engine(url=database_url, **get_engine_options())
+        instrument_engine(engine)
+    return engine
 
-def get_session():
-    with Session(engine) as session:
+
+def get_sync_engine() -> Engine:
+    engine = get_engine()
+    return engine.sync_engine if async_mode else engine
+
+
+def reset_pool_after_fork() -> None:
+    """Give a forked worker a pool of its own.
+
+    With ``GUNICORN_PRELOAD_APP`` an engine created in the master is copied
+    into each worker. Connections opened before the fork are dropped from the
+    pool of the child without closing them, they still belong to the parent,
+    and the child opens its own.
+    """
+    if get_engine.cache_info().currsize:
+        get_sync_engine().dispose(close=False)
+
+
+os.register_at_fork(after_in_child=reset_pool_after_fork)
+
+
+def get_pool_status() -> dict:
+    """Connection counts of the engine pool in this worker process"""
+    pool = get_engine().pool
+    return dict(
+        pid=os.getpid(),
+        pool_class=type(pool).__name__,
+        size=pool.size(),
+        checked_out=pool.checkedout(),
+        idle=pool.checkedin(),
+        # overflow() counts down from -pool_size, only positive values are
+        # connections opened beyond the pool size
+        overflow=max(pool.overflow(), 0),
+        max_overflow=app_settings.database_max_overflow,
+    )
+
+
+# objects are serialized for the response after the commit, from the values
+# the writes returned instead of reloading expired attributes
+def get_sync_session():
+    with Session(get_engine(), expire_on_commit=False) as session:
         yield session
+
+
+async def get_async_session():
+    async with AsyncSession(get_engine(), expire_on_commit=False) as session:
+        yield session
+
+
+get_session = get_async_session if async_mode else get_sync_session
@@ -0,0 +1,20 @@
+"""JSON encoding shared by the responses and the log formatter"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # optional, the stdlib encoder is used without it
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON with orjson when it is installed, values neither
+    encoder knows are written as their string
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=str)
+    return json.dumps(
+        content, ensure_ascii=False, separators=(",", ":"), default=str
+    ).encode()
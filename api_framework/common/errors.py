@@ -0,0 +1,124 @@
+"""Error responses and rate limited error logs of the exception handlers"""
+
+import logging
+import time
+import traceback
+
+from fastapi import status
+from starlette.responses import Response
+
+from api_framework import app_settings
+from api_framework.common.encoders import dumps
+from api_framework.common.responses import ModelResponse
+from api_framework.exceptions import AppBaseError
+
+UNKNOWN_ERROR_CODE = "api.error.999"
+UNKNOWN_ERROR_MESSAGE = "Internal server error"
+
+
+def app_error_response(error: AppBaseError) -> Response:
+    """Response of a known error, the handler is looked up by Starlette along
+    the MRO of the error and the payload is the one its class built when it
+    was defined
+    """
+    error_class = type(error)
+    if (
+        error.message == error_class.message
+        and error.http_code == error_class.http_code
+    ):
+        return Response(
+            error_class.error_body,
+            status_code=error.http_code,
+            media_type="application/json",
+        )
+    payload = dict(
+        error_class.error_payload, message=error.message, http_code=error.http_code
+    )
+    return ModelResponse({"errors": [payload]}, status_code=error.http_code)
+
+
+UNKNOWN_ERROR_BODY = dumps(
+    {
+        "errors": [
+            dict(
+                code=UNKNOWN_ERROR_CODE,
+                type="InternalServerError",
+                message=UNKNOWN_ERROR_MESSAGE,
+            )
+        ]
+    }
+)
+
+
+def unknown_error_response(error: Exception) -> Response:
+    """500 response of an unexpected error, its message and traceback are only
+    formatted into the response with ``DEBUG_MODE``
+    """
+    if not app_settings.debug_mode:
+        return Response(
+            UNKNOWN_ERROR_BODY,
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            media_type="application/json",
+        )
+    detail = dict(
+        code=UNKNOWN_ERROR_CODE,
+        type=type(error).__name__,
+        message=str(error),
+        traceback="".join(traceback.format_exception(error)),
+    )
+    return ModelResponse(
+        {"errors": [detail]}, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+    )
+
+
+class ErrorLogLimiter:
+    """Logs the first of the identical errors raised within ``interval``
+    seconds and counts the others, the count is logged with the next one
+    after the interval.
+
+    Errors are identical when they have the same type and message (and for
+    unexpected errors the same place they were raised from). Only the logged
+    ones format a traceback. An ``interval`` of 0 logs every error.
+    """
+
+    def __init__(self, logger: logging.Logger, interval: float, max_keys: int = 1024):
+        self.logger = logger
+        self.interval = interval
+        self.max_keys = max_keys
+        self.windows: dict[tuple, list] = {}
+
+    @staticmethod
+    def error_key(error: Exception) -> tuple:
+        if isinstance(error, AppBaseError):
+            return type(error), error.message
+        tb = error.__traceback__
+        while tb is not None and tb.tb_next is not None:
+            tb = tb.tb_next
+        origin = (tb.tb_frame.f_code.co_filename, tb.tb_lineno) if tb else None
+        return type(error), str(error), origin
+
+    def log(self, error: Exception, exc_info: bool = True) -> bool:
+        """Log the error unless an identical one was logged within the
+        interval, returns whether it was logged
+        """
+        suppressed = 0
+        if self.interval > 0:
+            key = self.error_key(error)
+            now = time.monotonic()
+            window = self.windows.get(key)
+            if window is not None and now - window[0] < self.interval:
+                window[1] += 1
+                return False
+            if window is not None:
+                suppressed = window[1]
+            elif len(self.windows) >= self.max_keys:
+                self.windows.clear()
+            self.windows[key] = [now, 0]
+        self.logger.error(
+            "api error %s: %s%s",
+            type(error).__name__,
+            error.message if isinstance(error, AppBaseError) else error,
+            f" ({suppressed} more since the last one logged)" if suppressed else "",
+            exc_info=error if exc_info else None,
+        )
+        return True
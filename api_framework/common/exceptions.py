@@ -4,7 +4,11 @@ from api_framework.exceptions import AppBaseError
 
 
 @dataclass
-class CommonBaseError(AppBaseError):
-    @property
-    def code(self):
-        return f"common.error.{self.error_number}"
+class CommonBaseError(AppBaseError, error_number=9):
+    code_prefix = "common.error"
+
+
+@dataclass
+class MetricsNotEnabledError(CommonBaseError, error_number=12):
+    message: str = "Metrics are not enabled"
+    http_code: int = 404
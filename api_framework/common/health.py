@@ -0,0 +1,157 @@
+"""Readiness of the worker: database, engine pool and schema revision"""
+
+import asyncio
+import logging
+import time
+
+from sqlalchemy import Connection, Engine, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import QueuePool
+
+from api_framework import app_settings
+from api_framework.common.dependencies import get_engine
+
+logger = logging.getLogger(f"{app_settings.logger_name}.common")
+
+
+def check_pool() -> tuple[bool, str]:
+    """Whether the pool has a connection left to lend, a saturated pool makes
+    requests wait up to ``DATABASE_POOL_TIMEOUT`` for one. Pools that open a
+    connection per checkout (``NullPool``) or share a single one, and a
+    ``QueuePool`` without an overflow limit, are never saturated.
+    """
+    pool = get_engine().pool
+    if not isinstance(pool, QueuePool):
+        return True, type(pool).__name__
+    checked_out = pool.checkedout()
+    max_overflow = app_settings.database_max_overflow
+    if max_overflow < 0:
+        return True, f"{checked_out} in use, no overflow limit"
+    limit = pool.size() + max_overflow
+    return checked_out < limit, f"{checked_out}/{limit} in use"
+
+
+def check_revision(connection: Connection) -> tuple[bool, str]:
+    # alembic is only imported when the first probe runs, not with the app
+    from api_framework.migrations.alembic_runner import (
+        get_current_heads,
+        get_script_heads,
+    )
+
+    current = get_current_heads(connection)
+    return current == get_script_heads(), ", ".join(sorted(current)) or "<none>"
+
+
+def run_database_checks(connection: Connection, verify_head: bool) -> dict:
+    """Ping the database and, when ``verify_head`` is set, check its schema
+    revision on the same connection, both through the pool of the app
+    """
+    connection.execute(text("SELECT 1"))
+    results = dict(database=(True, "SELECT 1"))
+    if verify_head:
+        try:
+            results["migrations"] = check_revision(connection)
+        except Exception as e:
+            logger.debug("Readiness check migrations failed", exc_info=True)
+            results["migrations"] = (False, type(e).__name__)
+    return results
+
+
+def check_sync_engine(engine: Engine, verify_head: bool) -> dict:
+    with engine.connect() as connection:
+        return run_database_checks(connection, verify_head)
+
+
+async def check_database(verify_head: bool) -> dict:
+    engine = get_engine()
+    if isinstance(engine, AsyncEngine):
+        async with engine.connect() as connection:
+            return await connection.run_sync(run_database_checks, verify_head)
+    return await asyncio.to_thread(check_sync_engine, engine, verify_head)
+
+
+def retrieve_exception(task: asyncio.Task) -> None:
+    # the error of a check that outlasted its probe is not reported again
+    if not task.cancelled():
+        task.exception()
+
+
+class ReadinessProbe:
+    """Readiness of the worker, checked at most once per ``ttl`` seconds.
+
+    Probes within the ttl get the last result, and those arriving while it is
+    checked wait for that check rather than starting their own, so the
+    database sees at most one check per worker per ttl however often the
+    orchestrator probes. A database check that outlasts ``READINESS_TIMEOUT``
+    keeps running and the next probes fail at once until it ends, so a hung
+    database never holds more than one connection or thread of the worker.
+    The schema revision only changes with a deploy, it is no longer checked
+    once the worker found it at head.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.result: dict | None = None
+        self.checked_at = 0.0
+        self.lock = asyncio.Lock()
+        self.at_head = False
+        self.database_task: asyncio.Task | None = None
+
+    def is_fresh(self) -> bool:
+        return self.result is not None and time.monotonic() - self.checked_at < self.ttl
+
+    async def check_database(self, verify_head: bool) -> dict:
+        if self.database_task is None or self.database_task.done():
+            self.database_task = asyncio.ensure_future(check_database(verify_head))
+            self.database_task.add_done_callback(retrieve_exception)
+        try:
+            return await asyncio.wait_for(
+                asyncio.shield(self.database_task), app_settings.readiness_timeout
+            )
+        except Exception as e:
+            logger.debug("Readiness check database failed", exc_info=True)
+            return dict(database=(False, type(e).__name__))
+
+    async def check(self) -> dict:
+        """Run the readiness checks of this worker.
+
+        The database is only checked when the pool has a connection to spare,
+        so a probe never waits for the pool timeout, and the schema revision
+        is not checked when ``WORKER_MIGRATIONS`` is off.
+        """
+        results = dict(pool=check_pool())
+        verify_head = app_settings.worker_migrations != "off"
+        if results["pool"][0]:
+            results.update(await self.check_database(verify_head and not self.at_head))
+        if verify_head and self.at_head:
+            results["migrations"] = (True, "at head")
+        elif "migrations" in results:
+            self.at_head = results["migrations"][0]
+        checks = [
+            dict(name=name, ok=ok, detail=detail)
+            for name, (ok, detail) in results.items()
+        ]
+        return dict(ready=all(check["ok"] for check in checks), checks=checks)
+
+    async def get(self) -> dict:
+        if self.is_fresh():
+            return self.result
+        async with self.lock:
+            if not self.is_fresh():
+                result = await self.check()
+                # logged when the worker stops being ready, not at every check
+                if not result["ready"] and (self.result or {}).get("ready", True):
+                    logger.warning(
+                        "Worker is not ready: %s",
+                        ", ".join(
+                            f"{check['name']} ({check['detail']})"
+                            for check in result["checks"]
+                            if not check["ok"]
+                        ),
+                    )
+                self.result = result
+                self.checked_at = time.monotonic()
+        return self.result
+
+
+readiness_probe = ReadinessProbe(ttl=app_settings.readiness_cache_ttl)
@@ -0,0 +1,96 @@
+"""Log handlers referenced by the dictConfig in ``logger_conf``"""
+
+import logging
+import os
+import queue
+import weakref
+from logging.handlers import QueueHandler, QueueListener
+
+ALL_QUEUE_HANDLERS: "weakref.WeakSet[QueueStreamHandler]" = weakref.WeakSet()
+
+
+class DrainingQueueListener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # waits for room instead of failing on a full queue, so stop() writes
+        # out every queued record
+        self.queue.put(self._sentinel)
+
+
+class QueueStreamHandler(QueueHandler):
+    """Stream handler that formats and writes records on a background thread.
+
+    Logging calls only put the record on a bounded queue. A ``QueueListener``
+    thread formats the records with the handler's formatter and writes them to
+    the stream. When the queue is full the ``drop`` policy discards the record
+    and counts it, the ``block`` policy waits for room.
+    """
+
+    def __init__(self, stream=None, max_size: int = 10000, policy: str = "drop"):
+        if policy not in ("drop", "block"):
+            raise ValueError(f"{policy} is not a valid log queue policy")
+        super().__init__(queue.Queue(maxsize=max_size))
+        self.target = logging.StreamHandler(stream)
+        self.max_size = max_size
+        self.policy = policy
+        self.dropped = 0
+        self.listener = None
+        self.start()
+        ALL_QUEUE_HANDLERS.add(self)
+
+    def start(self) -> None:
+        self.listener = DrainingQueueListener(
+            self.queue, self.target, respect_handler_level=True
+        )
+        self.listener.start()
+
+    def close(self) -> None:
+        # called by logging.shutdown at exit, the records still in the queue
+        # are written out before the stream is closed
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        self.target.close()
+        super().close()
+
+    def restart(self) -> None:
+        # the queue lock may be held by the parent's listener thread at fork
+        self.queue = queue.Queue(maxsize=self.max_size)
+        self.dropped = 0
+        self.start()
+
+    def setFormatter(self, fmt: logging.Formatter | None) -> None:
+        # records are formatted by the stream handler on the listener thread
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # the queue is in-process so the record is passed as is, the message
+        # is not formatted on the logging thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.policy == "block":
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def stats(self) -> dict:
+        return dict(
+            name=self.name,
+            policy=self.policy,
+            depth=self.queue.qsize(),
+            max_size=self.max_size,
+            dropped=self.dropped,
+        )
+
+
+def restart_queue_handlers() -> None:
+    for handler in list(ALL_QUEUE_HANDLERS):
+        if handler.listener is not None:
+            handler.restart()
+
+
+# a forked worker inherits the queue but not the listener thread
+os.register_at_fork(after_in_child=restart_queue_handlers)
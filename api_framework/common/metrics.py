@@ -0,0 +1,165 @@
+"""Prometheus metrics of the requests served by the workers.
+
+With ``PROMETHEUS_MULTIPROC_DIR`` set (before the app is imported) each worker
+writes its values to memory mapped files in that directory and ``/metrics``
+aggregates the files of all the workers, whichever worker serves it.
+"""
+
+import logging
+import os
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from api_framework import app_settings
+from api_framework.common.context import query_stats_var
+
+try:
+    import prometheus_client
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST,
+        CollectorRegistry,
+        Counter,
+        Gauge,
+        Histogram,
+        multiprocess,
+    )
+except ImportError:  # optional, the metrics are disabled without it
+    prometheus_client = None
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+logger = logging.getLogger(f"{app_settings.logger_name}.common")
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+def metrics_enabled() -> bool:
+    """Whether the metrics are recorded, ``METRICS_ENABLED`` and the
+    ``metrics`` extra installed
+    """
+    if app_settings.metrics_enabled and prometheus_client is None:
+        logger.warning("prometheus-client is not installed, metrics are disabled")
+    return app_settings.metrics_enabled and prometheus_client is not None
+
+
+class RequestMetrics:
+    """Latency, in-flight requests and database statements of the requests.
+
+    Each observation takes a lock (and writes a memory mapped file in
+    multiprocess mode), so a request does as few as it can: the children of
+    the labelled metrics are cached, the statements and their time are two
+    counters rather than histograms, divided by the request count of the
+    route for their average, and requests without statements skip them.
+    """
+
+    def __init__(self, registry=None, buckets: tuple[float, ...] | None = None):
+        registry = registry or prometheus_client.REGISTRY
+        buckets = buckets or tuple(app_settings.metrics_buckets)
+        self.duration = Histogram(
+            "http_request_duration_seconds",
+            "Latency of the requests",
+            ("method", "route", "status"),
+            buckets=buckets,
+            registry=registry,
+        )
+        self.in_flight = Gauge(
+            "http_requests_in_flight",
+            "Requests being served",
+            multiprocess_mode="livesum",
+            registry=registry,
+        )
+        self.db_queries = Counter(
+            "http_request_db_queries",
+            "Database statements run by the requests",
+            ("route",),
+            registry=registry,
+        )
+        self.db_duration = Counter(
+            "http_request_db_seconds",
+            "Time the requests spent in the database",
+            ("route",),
+            registry=registry,
+        )
+        self.children: dict[tuple, tuple] = {}
+
+    def start(self) -> None:
+        self.in_flight.inc()
+
+    def observe(
+        self,
+        method: str,
+        route: str,
+        status: int,
+        duration: float,
+        queries: int,
+        db_duration: float,
+    ) -> None:
+        key = (method, route, status)
+        if (children := self.children.get(key)) is None:
+            children = self.children[key] = (
+                self.duration.labels(method, route, str(status)),
+                self.db_queries.labels(route),
+                self.db_duration.labels(route),
+            )
+        duration_child, queries_child, db_duration_child = children
+        duration_child.observe(duration)
+        if queries:
+            queries_child.inc(queries)
+            db_duration_child.inc(db_duration)
+        self.in_flight.dec()
+
+
+request_metrics = RequestMetrics() if metrics_enabled() else None
+
+
+def generate_metrics() -> bytes:
+    """Metrics in the Prometheus text format, of all the workers sharing the
+    ``PROMETHEUS_MULTIPROC_DIR``, or of this process without it
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return prometheus_client.generate_latest(registry)
+
+
+class MetricsMiddleware:
+    """Records the latency, status and database statements of each request
+    under the path template of its route, ``/user/{username}``, so the
+    label values stay bounded whatever the paths requested.
+    """
+
+    def __init__(self, app: ASGIApp, metrics: RequestMetrics | None = None):
+        self.app = app
+        self.metrics = metrics or request_metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        self.metrics.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # FastAPI adds the matched route to the scope
+            route = scope.get("route")
+            stats = query_stats_var.get()
+            self.metrics.observe(
+                scope["method"],
+                route.path if route is not None else UNMATCHED_ROUTE,
+                status_code,
+                time.perf_counter() - start,
+                stats.count if stats else 0,
+                stats.duration if stats else 0.0,
+            )
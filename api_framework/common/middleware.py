@@ -1,52 +1,162 @@
-import json
 import logging
-from typing import Any, Callable, Coroutine
+import random
+import time
+from uuid import uuid4
 
-from fastapi import Request
-from fastapi.routing import APIRoute
-from starlette.background import BackgroundTask
-from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from api_framework import app_settings
+from api_framework.common.context import (
+    QueryStats,
+    query_stats_var,
+    request_id_var,
+    tenant_id_var,
+)
 
-async def log_request_info(request: Request, request_body, response: Response):
-    ds_logger = logging.getLogger(__name__)
-    args = {k: v for k, v in request.items()}
+logger = logging.getLogger(f"{app_settings.logger_name}.access")
 
-    response_body = None
-    if isinstance(response, JSONResponse):
-        response_body = json.loads(response.body.decode("utf8"))
 
-    ds_logger.info(
-        f"{args.get('method')} {args.get('path')} {args.get('scheme')} {response.status_code}"
-        f" Headers={[{k.decode(): v.decode()} for k, v in list(args.get('headers')) if k.startswith(b'x')]}"
-        f" Path Params={request.path_params} Query Params={request.query_params if request.query_params else 'None'}"
+def format_body(body: bytes, size: int) -> str:
+    """Body text for the log, ``body`` holds at most the first max size bytes
+    of a body of ``size`` bytes
+    """
+    text = body.decode("utf8", errors="replace")
+    if size > len(body):
+        return f"{text}... ({size} bytes)"
+    return text
+
+
+def log_body_sampled() -> bool:
+    """Whether the bodies of this request are logged, bodies are never kept for
+    logging when body logging is off or the logger would drop the records
+    """
+    return (
+        app_settings.log_bodies
+        and logger.isEnabledFor(logging.INFO)
+        and random.random() < app_settings.log_body_sample_rate
     )
-    if request_body:
-        ds_logger.info(f"Request Body={request_body}")
-    if response_body:
-        ds_logger.info(f"Response Body={response_body}")
 
 
-class LogRoute(APIRoute):
-    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
-        original_route_handler = super().get_route_handler()
+class AccessLogMiddleware:
+    """Access log of method, path, status, bytes in/out and latency.
+
+    A pure ASGI middleware that reads everything it logs from the ``receive``
+    and ``send`` messages as they pass through, so streaming responses are
+    never buffered and no task is started per request.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not logger.isEnabledFor(logging.INFO):
+            await self.app(scope, receive, send)
+            return
 
-        async def custom_route_handler(request: Request) -> Response:
-            try:
-                request_body = await request.json()
-            except json.decoder.JSONDecodeError:
-                request_body = await request.body()
+        start = time.perf_counter()
+        max_size = app_settings.log_body_max_size
+        # only the first max size bytes of each body are kept, when sampled
+        request_body = bytearray() if log_body_sampled() else None
+        response_body = None if request_body is None else bytearray()
+        status_code = 500
+        bytes_in = bytes_out = 0
 
-            response: Response = await original_route_handler(request)
-            background_task: BackgroundTask = BackgroundTask(
-                log_request_info, request, request_body, response
+        async def receive_wrapper() -> Message:
+            nonlocal bytes_in
+            message = await receive()
+            if message["type"] == "http.request":
+                body = message.get("body", b"")
+                bytes_in += len(body)
+                if request_body is not None and len(request_body) < max_size:
+                    request_body.extend(body[: max_size - len(request_body)])
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, bytes_out
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                body = message.get("body", b"")
+                bytes_out += len(body)
+                if response_body is not None and len(response_body) < max_size:
+                    response_body.extend(body[: max_size - len(response_body)])
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            stats = query_stats_var.get()
+            logger.info(
+                "%s %s %s %s in=%dB out=%dB %.2fms queries=%d db=%.2fms "
+                "Path Params=%s Query Params=%s",
+                scope["method"],
+                scope["path"],
+                scope["scheme"],
+                status_code,
+                bytes_in,
+                bytes_out,
+                (time.perf_counter() - start) * 1000,
+                stats.count if stats else 0,
+                stats.duration * 1000 if stats else 0.0,
+                scope.get("path_params", {}),
+                scope["query_string"].decode() or "None",
             )
-            if response.background is None:
-                response.background = background_task
-            else:
-                response.background.add_task(
-                    background_task.func, *background_task.args, *background_task.kwargs
-                )
-            return response
-
-        return custom_route_handler
+            if request_body:
+                logger.info("Request Body=%s", format_body(request_body, bytes_in))
+            if response_body:
+                logger.info("Response Body=%s", format_body(response_body, bytes_out))
+
+
+def server_timing(stats: QueryStats, start: float) -> bytes:
+    """``Server-Timing`` header value of the database statements of a request
+    and of the time it took until its response started
+    """
+    return (
+        f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries", '
+        f"app;dur={(time.perf_counter() - start) * 1000:.2f}"
+    ).encode("latin-1")
+
+
+class RequestContextMiddleware:
+    """Sets the request and tenant ids of the request context once per request
+    and returns the request id in the ``X-Request-ID`` response header. The
+    database statements of the request are counted in a ``QueryStats`` of the
+    context as well, and returned in the ``Server-Timing`` header (unless
+    ``SERVER_TIMING`` is off) with the time the request took.
+
+    An ``X-Request-ID`` sent by the client (or a proxy) is kept, otherwise one
+    is generated. The values are not reset at the end, each request runs in its
+    own task, so the exception handler that runs outside of this middleware
+    still logs them.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        request_id = tenant_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id" and 0 < len(value) <= 128:
+                request_id = value.decode("latin-1")
+            elif name == b"x-tenant-id":
+                tenant_id = value.decode("latin-1")
+        request_id = request_id or uuid4().hex
+        request_id_var.set(request_id)
+        tenant_id_var.set(tenant_id)
+        query_stats_var.set(stats := QueryStats(scope))
+        request_id_header = (b"x-request-id", request_id.encode("latin-1"))
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = [*message.get("headers", ()), request_id_header]
+                if app_settings.server_timing:
+                    headers.append((b"server-timing", server_timing(stats, start)))
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,18 @@
+"""Opaque cursors for keyset pagination"""
+
+import base64
+import binascii
+
+from api_framework.exceptions import InvalidValueError
+
+
+def encode_cursor(key: str) -> str:
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return base64.b64decode(padded, altchars=b"-_", validate=True).decode()
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise InvalidValueError(message=f"Invalid cursor {cursor}") from e
@@ -0,0 +1,48 @@
+"""JSON response classes"""
+
+import logging
+from typing import Any
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import BaseModel
+from starlette.responses import Response
+
+from api_framework import app_settings
+from api_framework.common.encoders import dumps, orjson
+
+logger = logging.getLogger(f"{app_settings.logger_name}.common")
+
+RESPONSE_CLASSES: dict[str, type[JSONResponse]] = {
+    "json": JSONResponse,
+    "orjson": ORJSONResponse,
+}
+
+
+def get_default_response_class() -> type[JSONResponse]:
+    """Response class of the ``default_response_class`` setting, orjson falls
+    back to the stdlib encoder when it is not installed
+    """
+    if (name := app_settings.default_response_class) not in RESPONSE_CLASSES:
+        raise ValueError(f"{name} is not a valid response class")
+    if name == "orjson" and orjson is None:
+        logger.warning("orjson is not installed, responses use the json encoder")
+        return JSONResponse
+    return RESPONSE_CLASSES[name]
+
+
+class ModelResponse(Response):
+    """JSON response for content that already has the shape of the response
+    model, returned by a route instead of the content itself.
+
+    FastAPI dumps a returned model, validates the result against the
+    ``response_model`` again and encodes it to JSON. A model given here is
+    serialized straight to JSON bytes by pydantic-core (with its aliases), and
+    dicts and lists are encoded as they are.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content, by_alias=True)
+        return dumps(content)
@@ -1,26 +1,59 @@
 import logging
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Response, status
 
 from api_framework import app_settings
-from api_framework.common.middleware import LogRoute
+from api_framework.common.cache import ALL_CACHES
+from api_framework.common.dependencies import get_pool_status
+from api_framework.common.exceptions import MetricsNotEnabledError
+from api_framework.common.health import readiness_probe
+from api_framework.common.log_handlers import ALL_QUEUE_HANDLERS
+from api_framework.common.metrics import (
+    CONTENT_TYPE_LATEST,
+    generate_metrics,
+    request_metrics,
+)
+from api_framework.common.schemas import (
+    CacheStatsSchema,
+    LogQueueStatsSchema,
+    PoolStatusSchema,
+    ReadinessSchema,
+)
 
 router = APIRouter(
     tags=[
         "common",
     ],
-    route_class=LogRoute,
 )
 
 logger = logging.getLogger(f"{app_settings.logger_name}.common")
 
 
 @router.get("/healthcheck")
+@router.get("/liveness")
 def get_healthcheck():
+    """Liveness, the worker answers requests, nothing else is checked so a
+    database outage does not get the workers restarted
+    """
     logger.debug("Healthcheck")
     return {"msg": "Happy"}
 
 
+@router.get(
+    "/readiness",
+    response_model=ReadinessSchema,
+    responses={status.HTTP_503_SERVICE_UNAVAILABLE: {"model": ReadinessSchema}},
+)
+async def get_readiness(response: Response):
+    """Readiness, the database answers, the pool has a connection to spare
+    and the schema is at head, checked at most once per ``READINESS_CACHE_TTL``
+    """
+    result = await readiness_probe.get()
+    if not result["ready"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return result
+
+
 @router.get("/info")
 def get_info():
     return {
@@ -28,3 +61,25 @@ def get_info():
         for k, v in app_settings.model_dump().items()
         if "password" not in k.lower()
     }
+
+
+@router.get("/pool", response_model=PoolStatusSchema)
+def get_pool():
+    return get_pool_status()
+
+
+@router.get("/cache", response_model=list[CacheStatsSchema])
+def get_cache():
+    return [cache.stats() for cache in ALL_CACHES.values()]
+
+
+@router.get("/log-queue", response_model=list[LogQueueStatsSchema])
+def get_log_queue():
+    return [handler.stats() for handler in ALL_QUEUE_HANDLERS]
+
+
+@router.get("/metrics", response_class=Response)
+def get_metrics():
+    if request_metrics is None:
+        raise MetricsNotEnabledError
+    return Response(generate_metrics(), media_type=CONTENT_TYPE_LATEST)
@@ -1,4 +1,8 @@
-from typing import Dict, List, Optional
+import types
+from collections.abc import Callable
+from functools import cache
+from operator import attrgetter
+from typing import Any, Dict, List, Optional, Union, get_args, get_origin
 
 from pydantic import BaseModel
 from pydantic import ConfigDict
@@ -28,6 +32,110 @@ class AppBaseSchema(BaseModel):
         from_attributes=True,
     )
 
+    @classmethod
+    def dump_attributes(cls, obj: Any) -> dict:
+        """Wire format (camel-case aliases) of a trusted object, such as an ORM
+        row, read attribute by attribute without validating it.
+
+        ``model_validate(obj).model_dump(by_alias=True)`` builds an instance of
+        the schema, and of each nested schema, only to dump it again. The
+        object has to be trusted to hold valid data already, validators (and
+        the changes they make) are not run, so it is meant for rows that were
+        written through the same schema.
+        """
+        return get_attribute_dumper(cls)(obj)
+
+
+def nested_schema(annotation: Any) -> tuple[type[AppBaseSchema] | None, bool]:
+    """Schema of a field annotation and whether it holds a list of them"""
+    if get_origin(annotation) in (Union, types.UnionType):
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if len(args) != 1:
+            return None, False
+        annotation = args[0]
+    many = get_origin(annotation) is list
+    if many:
+        annotation = get_args(annotation)[0]
+    if isinstance(annotation, type) and issubclass(annotation, AppBaseSchema):
+        return annotation, many
+    return None, False
+
+
+@cache
+def get_attribute_dumper(schema: type[AppBaseSchema]) -> Callable[[Any], dict]:
+    """Dumper of a schema compiled once: a single getter for all the fields,
+    their aliases and the dumpers of the nested schemas
+    """
+    names = tuple(schema.model_fields)
+    aliases = tuple(
+        field.serialization_alias or field.alias or name
+        for name, field in schema.model_fields.items()
+    )
+    getter = attrgetter(*names)
+    if len(names) == 1:
+
+        def values(obj: Any) -> tuple:
+            # attrgetter of a single name returns the value, not a tuple
+            return (getter(obj),)
+
+    else:
+        values = getter
+    nested = []
+    for alias, field in zip(aliases, schema.model_fields.values()):
+        nested_model, many = nested_schema(field.annotation)
+        if nested_model is not None:
+            nested.append((alias, get_attribute_dumper(nested_model), many))
+
+    def dump(obj: Any) -> dict:
+        data = dict(zip(aliases, values(obj)))
+        for alias, dumper, many in nested:
+            if (value := data[alias]) is not None:
+                data[alias] = (
+                    [dumper(item) for item in value] if many else dumper(value)
+                )
+        return data
+
+    return dump
+
 
 class AppStandardResponse(AppBaseSchema):
     message: str
+
+
+class PoolStatusSchema(AppBaseSchema):
+    pid: int
+    pool_class: str
+    size: int
+    checked_out: int
+    idle: int
+    overflow: int
+    max_overflow: int
+
+
+class ReadinessCheckSchema(AppBaseSchema):
+    name: str
+    ok: bool
+    detail: str
+
+
+class ReadinessSchema(AppBaseSchema):
+    ready: bool
+    checks: list[ReadinessCheckSchema]
+
+
+class CacheStatsSchema(AppBaseSchema):
+    name: str
+    backend: str
+    hits: int
+    misses: int
+    evictions: int
+    size: int | None = None
+    max_size: int | None = None
+
+
+class LogQueueStatsSchema(AppBaseSchema):
+    name: str | None = None
+    policy: str
+    depth: int
+    max_size: int
+    dropped: int
@@ -1 +1,70 @@
 """Add common or base database services here"""
+
+from contextlib import asynccontextmanager
+
+from sqlalchemy.exc import DBAPIError
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+def is_rejected_data(error: DBAPIError) -> bool:
+    """Whether the database rejected the values written, an integrity constraint
+    violation (SQLSTATE class 23) or invalid data (class 22), rather than failed
+    """
+    return (getattr(error.orig, "pgcode", None) or "")[:2] in ("22", "23")
+
+
+def database_error_message(error: DBAPIError) -> str:
+    # psycopg2 errors carry their diagnostics, asyncpg ones are chained to the
+    # error of the driver
+    if (diag := getattr(error.orig, "diag", None)) is not None:
+        return diag.message_primary
+    return getattr(error.orig.__cause__, "message", None) or str(error.orig)
+
+
+class BaseService:
+    """Base database service that works with either a sync ``Session`` or an
+    ``AsyncSession``, depending on the driver of the configured database url.
+    """
+
+    def __init__(self, session: Session | AsyncSession):
+        self.session = session
+        self.is_async = isinstance(session, AsyncSession)
+
+    async def exec(self, statement):
+        if self.is_async:
+            return await self.session.exec(statement)
+        return self.session.exec(statement)
+
+    async def execute(self, statement, params=None):
+        if self.is_async:
+            return await self.session.execute(statement, params)
+        return self.session.execute(statement, params)
+
+    async def commit(self) -> None:
+        if self.is_async:
+            await self.session.commit()
+        else:
+            self.session.commit()
+
+    async def rollback(self) -> None:
+        if self.is_async:
+            await self.session.rollback()
+        else:
+            self.session.rollback()
+
+    @asynccontextmanager
+    async def savepoint(self):
+        """Savepoint rolled back, alone, when its block raises"""
+        if self.is_async:
+            async with self.session.begin_nested():
+                yield
+        else:
+            with self.session.begin_nested():
+                yield
+
+    async def delete(self, instance) -> None:
+        if self.is_async:
+            await self.session.delete(instance)
+        else:
+            self.session.delete(instance)
@@ -1,73 +1,111 @@
 """Defined exceptions for the api_framework Service"""
 
+import json
 from dataclasses import dataclass
 from typing import Dict, Type
 
 ALL_EXCEPTIONS: Dict[str, Type] = {}
+ERROR_CODES: Dict[str, Type] = {}
+
+
+def dump_payload(payload: dict) -> bytes:
+    return json.dumps(
+        {"errors": [payload]}, ensure_ascii=False, separators=(",", ":")
+    ).encode()
+
+
+def qualified_name(cls: Type) -> str:
+    return f"{cls.__module__}.{cls.__qualname__}"
 
 
 @dataclass
 class AppBaseError(Exception):
-    """App Base Exception"""
+    """App Base Exception
+
+    Each subclass declares its number, ``class MyError(AppBaseError,
+    error_number=12)``, which makes its ``code`` with the ``code_prefix`` of
+    the class. Codes are set when the class is defined, so they do not depend
+    on the import order, and two classes with the same code are an error. The
+    payload of the error response with the defaults of the class is built
+    then as well.
+    """
 
     message: str = "Base exception"
     http_code: int = 500
 
-    @property
-    def code(self):
-        return f"api.error.{self.error_number}"
+    code_prefix = "api.error"
 
     @classmethod
-    def __init_subclass__(cls, **kwargs):
+    def __init_subclass__(cls, error_number: int | None = None, **kwargs):
         super().__init_subclass__(**kwargs)
-        cls.error_number = f"{len(ALL_EXCEPTIONS):03}"
+        if error_number is None:
+            raise TypeError(f"{cls.__name__} does not declare its error_number")
+        code = f"{cls.code_prefix}.{error_number:03}"
+        other = ERROR_CODES.get(code)
+        # the same class defined again (a module reloaded) keeps its code
+        if other is not None and qualified_name(other) != qualified_name(cls):
+            raise TypeError(
+                f"{qualified_name(cls)} reuses the code {code} of "
+                f"{qualified_name(other)}"
+            )
+        cls.error_number = f"{error_number:03}"
+        cls.code = code
+        # the dataclass fields are still plain class attributes with their defaults
+        cls.error_payload = dict(
+            type=cls.__name__,
+            code=code,
+            message=cls.message,
+            http_code=cls.http_code,
+        )
+        cls.error_body = dump_payload(cls.error_payload)
+        ERROR_CODES[code] = cls
         ALL_EXCEPTIONS[cls.__name__] = cls
 
 
 @dataclass
-class TestError(AppBaseError):
+class TestError(AppBaseError, error_number=0):
     message: str = "Test exception"
 
 
 @dataclass
-class HTTPTestError(AppBaseError):
+class HTTPTestError(AppBaseError, error_number=1):
     http_code: int = 403
 
 
 @dataclass
-class InvalidValueError(AppBaseError):
+class InvalidValueError(AppBaseError, error_number=2):
     http_code: int = 400
 
 
 @dataclass
-class InvalidActionError(AppBaseError):
+class InvalidActionError(AppBaseError, error_number=3):
     message: str = "Invalid action provided"
     http_code: int = 400
 
 
 @dataclass
-class FileWriteError(AppBaseError):
+class FileWriteError(AppBaseError, error_number=4):
     message: str = "Failed to write the file"
     http_code: int = 500
 
 
 @dataclass
-class ExecutionError(AppBaseError):
+class ExecutionError(AppBaseError, error_number=5):
     http_code: int = 500
 
 
 @dataclass
-class AuthenticationError(AppBaseError):
+class AuthenticationError(AppBaseError, error_number=6):
     message: str = "Error occurred while fetching access token"
     http_code: int = 500
 
 
 @dataclass
-class UniqueColumnNotFoundError(AppBaseError):
+class UniqueColumnNotFoundError(AppBaseError, error_number=7):
     http_code: int = 500
 
 
 @dataclass
-class MissingConnectionDetailsError(AppBaseError):
+class MissingConnectionDetailsError(AppBaseError, error_number=8):
     message: str = "Missing Connection details"
     http_code: int = 500
@@ -1,5 +1,85 @@
+import math
 import os
 
-workers = int(os.environ.get("WORKERS", 1))
+from api_framework import app_settings
+
+
+def read_cgroup_cpus(root: str = "/sys/fs/cgroup") -> float | None:
+    """CPU limit of the container from its cgroup quota (v2 ``cpu.max`` or v1
+    ``cpu.cfs_quota_us``), None when there is no limit
+    """
+    try:
+        with open(os.path.join(root, "cpu.max")) as f:
+            quota, period = f.read().split()[:2]
+    except (OSError, ValueError):
+        try:
+            with open(os.path.join(root, "cpu", "cpu.cfs_quota_us")) as f:
+                quota = f.read().strip()
+            with open(os.path.join(root, "cpu", "cpu.cfs_period_us")) as f:
+                period = f.read().strip()
+        except OSError:
+            return None
+    if quota in ("max", "-1") or int(period) <= 0:
+        return None
+    return int(quota) / int(period)
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on, bounded by the cgroup quota"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS
+        cpus = os.cpu_count() or 1
+    if (limit := read_cgroup_cpus()) is not None:
+        cpus = min(cpus, math.ceil(limit))
+    return max(cpus, 1)
+
+
+# one async worker per CPU, each runs its own event loop and engine pool
+workers = app_settings.workers or available_cpus()
 worker_class = "uvicorn_worker.UvicornWorker"
-bind = "0.0.0.0:9000"
+bind = app_settings.gunicorn_bind
+backlog = app_settings.gunicorn_backlog
+# the app is imported and its routers registered once in the master, the
+# workers share those pages copy-on-write
+preload_app = app_settings.gunicorn_preload_app
+# workers are replaced after a number of requests, the jitter keeps them from
+# restarting all at once
+max_requests = app_settings.gunicorn_max_requests
+max_requests_jitter = app_settings.gunicorn_max_requests_jitter
+timeout = app_settings.gunicorn_timeout
+graceful_timeout = app_settings.gunicorn_graceful_timeout
+keepalive = app_settings.gunicorn_keepalive
+
+
+def clear_metrics_dir() -> None:
+    """Remove the metric files of the workers of a previous run"""
+    if directory := os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.endswith(".db"):
+                os.remove(os.path.join(directory, name))
+
+
+def on_starting(server):
+    """Run the migrations once in the master before the workers are forked,
+    the workers only check the schema is at head. Gunicorn stops when they
+    fail rather than forking workers that would fail that check.
+    """
+    clear_metrics_dir()
+    if app_settings.migrate_on_starting:
+        from api_framework.migrations.alembic_runner import upgrade
+
+        # gunicorn prints a RuntimeError raised by the master and exits
+        if not upgrade():
+            raise RuntimeError("Database migrations failed, not starting the workers")
+
+
+def child_exit(server, worker):
+    """Drop the in-flight requests of a worker that exited from the metrics"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        try:
+            from prometheus_client import multiprocess
+        except ImportError:
+            return
+        multiprocess.mark_process_dead(worker.pid)
@@ -1,7 +1,73 @@
+import json
+import logging
+
 from api_framework import app_settings
+from api_framework.common.encoders import dumps
+
+
+class JsonLogFormatter(logging.Formatter):
+    """JSON formatter for the ``json_log_format`` field mapping.
+
+    The mapping of output keys to record attributes is parsed once when the
+    formatter is created instead of being interpreted per record, and records
+    are serialized with orjson when it is installed. Attributes of
+    ``extra_fields`` (e.g. the request and tenant ids) are added when the
+    record has them.
+    """
+
+    def __init__(
+        self,
+        fmt: str,
+        datefmt: str | None = None,
+        extra_fields: dict[str, str] | None = None,
+    ):
+        super().__init__(datefmt=datefmt)
+        self.fields = tuple(json.loads(fmt).items())
+        self.extra_fields = tuple((extra_fields or {}).items())
+        self.uses_time = any(attr == "asctime" for _, attr in self.fields)
+        self._time_cache = (None, None)
+
+    def formatTime(self, record: logging.LogRecord, datefmt: str | None = None) -> str:
+        if datefmt is None:
+            return super().formatTime(record)
+        # a date format has second precision, its text is reused within a second
+        second, text = self._time_cache
+        if second != int(record.created):
+            text = super().formatTime(record, datefmt)
+            self._time_cache = (int(record.created), text)
+        return text
+
+    def format(self, record: logging.LogRecord) -> str:
+        record.message = record.getMessage()
+        if self.uses_time:
+            record.asctime = self.formatTime(record, self.datefmt)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            record.message = f"{record.message}\n{record.exc_text}"
+        if record.stack_info:
+            record.message = f"{record.message}\n{self.formatStack(record.stack_info)}"
+
+        attributes = record.__dict__
+        data = {key: attributes.get(attr) for key, attr in self.fields}
+        for key, attr in self.extra_fields:
+            if (value := attributes.get(attr)) is not None:
+                data[key] = value
+        return dumps(data).decode()
+
 
 log_level = "DEBUG" if app_settings.debug_mode else app_settings.log_level
 
+if app_settings.log_queue:
+    # records are formatted and written on a background thread
+    default_handler = {
+        "()": "api_framework.common.log_handlers.QueueStreamHandler",
+        "max_size": app_settings.log_queue_size,
+        "policy": app_settings.log_queue_policy,
+    }
+else:
+    default_handler = {"class": "logging.StreamHandler"}
+
 log_config = dict(
     version=1,
     disable_existing_loggers=False,
@@ -11,6 +77,12 @@ log_config = dict(
             "datefmt": "%Y-%m-%d %H:%M:%S",
         },
         "json": {
+            "()": "api_framework.logger_conf.JsonLogFormatter",
+            "fmt": app_settings.json_log_format,
+            "datefmt": "%Y-%m-%d %H:%M:%S",
+            "extra_fields": app_settings.json_log_extra_fields,
+        },
+        "jsonformatter": {
             "class": "jsonformatter.JsonFormatter",
             "format": app_settings.json_log_format,
             "datefmt": "%Y-%m-%d %H:%M:%S",
@@ -18,9 +90,13 @@ log_config = dict(
     },
     handlers={
         "default": {
-            "class": "logging.StreamHandler",
+            **default_handler,
             "stream": "ext://sys.stdout",
-            "formatter": "json" if app_settings.api_log_type == "json" else "default",
+            "formatter": (
+                app_settings.api_log_type
+                if app_settings.api_log_type in ("json", "jsonformatter")
+                else "default"
+            ),
         }
     },
     loggers={
@@ -1,32 +1,133 @@
 import logging
 import os
+import sys
+from functools import lru_cache
+from logging.config import dictConfig
 
 from alembic.config import Config
 from alembic import command
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
 from alembic.util.exc import CommandError
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.pool import NullPool
 
-path = os.path.join(os.getcwd(), "api_framework", "migrations", "alembic.ini")
+from api_framework import app_settings
+from api_framework.common.dependencies import get_database_url
+
+path = os.path.join(os.path.dirname(__file__), "alembic.ini")
 
-alembic_cfg = Config(path)
 logger = logging.getLogger(__name__)
 
+# key of the postgres advisory lock held while migrating, any constant shared by
+# every process running the migrations
+MIGRATION_LOCK_ID = 7_306_916_405_357_572_096
+
+
+@lru_cache
+def get_alembic_config() -> Config:
+    """Alembic config of the package, read on first use and found next to
+    this module whatever the working directory
+    """
+    return Config(path)
+
+
+def connect() -> Connection:
+    """Connection of a one-off engine through the sync driver, migrations
+    never use the pool of the app
+    """
+    engine = create_engine(get_database_url(sync=True), poolclass=NullPool)
+    return engine.connect()
+
+
+def lock(connection: Connection) -> None:
+    """Wait for the migration lock, released when the transaction ends, so
+    the processes starting at the same time migrate one after the other
+    """
+    if connection.dialect.name == "postgresql":
+        connection.execute(
+            text("SELECT pg_advisory_xact_lock(:key)"), dict(key=MIGRATION_LOCK_ID)
+        )
+
 
 def generate_revision(msg: str) -> None:
     try:
-        command.revision(alembic_cfg, message=msg, autogenerate=True)
+        command.revision(get_alembic_config(), message=msg, autogenerate=True)
+        get_script_heads.cache_clear()
     except CommandError as e:
         logger.error(f"Error during generating revision: {e}")
 
 
-def upgrade() -> None:
+def upgrade() -> bool:
+    """Upgrade the database to head under the migration lock, the processes
+    waiting for the lock find it at head already and do nothing
+    """
+    alembic_cfg = get_alembic_config()
     try:
-        command.upgrade(alembic_cfg, "head")
+        with connect() as connection, connection.begin():
+            lock(connection)
+            alembic_cfg.attributes["connection"] = connection
+            command.upgrade(alembic_cfg, "head")
     except CommandError as e:
         logger.error(f"Error during migration: {e}")
+        return False
+    finally:
+        alembic_cfg.attributes.pop("connection", None)
+    return True
 
 
 def downgrade(revision: str = "-1") -> None:
     try:
-        command.downgrade(alembic_cfg, revision)
+        command.downgrade(get_alembic_config(), revision)
     except CommandError as e:
         logger.error(f"Error during downgrade: {e}")
+
+
+@lru_cache
+def get_script_heads() -> frozenset[str]:
+    """Head revisions of the scripts, read once since they only change with a
+    new release
+    """
+    return frozenset(ScriptDirectory.from_config(get_alembic_config()).get_heads())
+
+
+def get_current_heads(connection: Connection) -> set[str]:
+    """Revisions the database of the connection is at"""
+    context = MigrationContext.configure(
+        connection,
+        opts=dict(version_table_schema=app_settings.database_default_schema),
+    )
+    return set(context.get_current_heads())
+
+
+def get_revisions() -> tuple[set[str], set[str]]:
+    """Revisions the database is at and head revisions of the scripts"""
+    with connect() as connection:
+        current = get_current_heads(connection)
+    return current, set(get_script_heads())
+
+
+def is_at_head() -> bool:
+    current, heads = get_revisions()
+    if current != heads:
+        logger.error(
+            "Database is at revision %s instead of head %s",
+            ", ".join(sorted(current)) or "<none>",
+            ", ".join(sorted(heads)),
+        )
+    return current == heads
+
+
+def main() -> None:
+    """Run the migrations once, e.g. from a release job before the workers
+    start: ``api-framework-migrate``
+    """
+    from api_framework.logger_conf import log_config
+
+    dictConfig(log_config)
+    sys.exit(0 if upgrade() else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,13 @@
 from logging.config import fileConfig
 
 from sqlalchemy import engine_from_config, pool
+from sqlalchemy.engine import Connection
 from sqlalchemy.schema import CreateSchema
 from sqlmodel import SQLModel
 from alembic import context
 
 from api_framework import app_settings
+from api_framework.common.dependencies import get_database_url
 from api_framework.user.models import User, UserAddress  # noqa
 # from api_framework.block.models import (
 #     Block,
@@ -23,13 +25,19 @@ from api_framework.user.models import User, UserAddress  # noqa
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
+# migrations always run through the sync driver, even when the app uses asyncpg.
+# "%" is escaped for the ini interpolation of url-quoted passwords
 config.set_main_option(
     "sqlalchemy.url",
-    app_settings.database_url.format(pswd=app_settings.database_password),
+    get_database_url(sync=True)
+    .render_as_string(hide_password=False)
+    .replace("%", "%%"),
 )
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
-if config.config_file_name is not None:
+# A connection given by alembic_runner comes from the app, whose logging is
+# configured already
+if config.config_file_name is not None and "connection" not in config.attributes:
     fileConfig(config.config_file_name, disable_existing_loggers=False)
 
 # add your model's MetaData object here
@@ -75,7 +83,13 @@ def run_migrations_online() -> None:
     In this scenario we need to create an Engine
     and associate a connection with the context.
 
+    alembic_runner passes its own connection, which holds the migration lock
+    in its transaction.
     """
+    if (connection := config.attributes.get("connection")) is not None:
+        do_run_migrations(connection)
+        return
+
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
@@ -83,18 +97,22 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(
-            connection=connection,
-            target_metadata=target_metadata,
-            version_table_schema=app_settings.database_default_schema,
-        )
-
-        connection.execute(
-            CreateSchema(name=app_settings.database_default_schema, if_not_exists=True)
-        )
-
-        with context.begin_transaction():
-            context.run_migrations()
+        do_run_migrations(connection)
+
+
+def do_run_migrations(connection: Connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        version_table_schema=app_settings.database_default_schema,
+    )
+
+    connection.execute(
+        CreateSchema(name=app_settings.database_default_schema, if_not_exists=True)
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
 
 
 if context.is_offline_mode():
@@ -0,0 +1,44 @@
+"""Unique address type per user
+
+Revision ID: 3c5e0f7a9b21
+Revises: aae47bdc13c9
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3c5e0f7a9b21"
+down_revision: Union[str, None] = "aae47bdc13c9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # the address type was unique across all users, which only allowed one
+    # home/work/other address in the whole table
+    op.drop_constraint(
+        "user_address_type_key", "user_address", schema="user_example", type_="unique"
+    )
+    op.create_unique_constraint(
+        "user_address_user_id_type_key",
+        "user_address",
+        ["user_id", "type"],
+        schema="user_example",
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint(
+        "user_address_user_id_type_key",
+        "user_address",
+        schema="user_example",
+        type_="unique",
+    )
+    op.create_unique_constraint(
+        "user_address_type_key", "user_address", ["type"], schema="user_example"
+    )
@@ -0,0 +1,45 @@
+"""Username search indexes
+
+Revision ID: 8d2b6e4f1a07
+Revises: 3c5e0f7a9b21
+Create Date: 2026-10-18 11:02:17.530912
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8d2b6e4f1a07"
+down_revision: Union[str, None] = "3c5e0f7a9b21"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # pg_trgm is a trusted extension, the database owner can create it
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_user_username_lower_pattern",
+        "user",
+        [sa.text("lower(username) text_pattern_ops")],
+        schema="user_example",
+    )
+    op.create_index(
+        "ix_user_username_trgm",
+        "user",
+        ["username"],
+        schema="user_example",
+        postgresql_using="gin",
+        postgresql_ops={"username": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_username_trgm", table_name="user", schema="user_example")
+    op.drop_index(
+        "ix_user_username_lower_pattern", table_name="user", schema="user_example"
+    )
@@ -5,12 +5,12 @@ from api_framework.exceptions import AppBaseError
 
 
 @dataclass
-class UserDoesNotExistError(CommonBaseError):
+class UserDoesNotExistError(CommonBaseError, error_number=10):
     message: str = "User does not exist"
     http_code: int = 404
 
 
 @dataclass
-class UserAlreadyExistError(AppBaseError):
+class UserAlreadyExistError(AppBaseError, error_number=11):
     message: str = "User already exists"
     http_code: int = 500
@@ -2,6 +2,7 @@ from enum import StrEnum, IntEnum
 from typing import Annotated
 
 from pydantic import AfterValidator
+from sqlalchemy import Index, UniqueConstraint, func
 from sqlmodel import Field, Relationship
 
 from api_framework.common.models import AppBaseModel
@@ -13,6 +14,11 @@ class UserStatus(StrEnum):
     ERROR: str = "error"
 
 
+class SearchMode(StrEnum):
+    PREFIX: str = "prefix"
+    CONTAINS: str = "contains"
+
+
 class AddressType(IntEnum):
     HOME: int = 1
     WORK: int = 2
@@ -52,10 +58,31 @@ class User(UserBaseTableModel, table=True):
     ]
 
 
+# case-insensitive prefix search, the pattern ops allow range scans that do not
+# depend on the database collation
+Index(
+    "ix_user_username_lower_pattern",
+    func.lower(User.username).label("username_lower"),
+    postgresql_ops={"username_lower": "text_pattern_ops"},
+)
+# contains search with ILIKE '%term%'
+Index(
+    "ix_user_username_trgm",
+    User.username,
+    postgresql_using="gin",
+    postgresql_ops={"username": "gin_trgm_ops"},
+)
+
+
 class UserAddress(UserBaseTableModel, table=True):
+    __table_args__ = (
+        UniqueConstraint("user_id", "type", name="user_address_user_id_type_key"),
+        UserBaseTableModel.__table_args__,
+    )
+
     type: Annotated[
         int,
-        Field(nullable=False, unique=True),
+        Field(nullable=False),
         AfterValidator(address_type_valid_values),
     ]
     address_line_1: str = Field(max_length=250, nullable=False)
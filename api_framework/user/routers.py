@@ -1,15 +1,31 @@
 import logging
+from datetime import datetime
 
-from fastapi import Depends, APIRouter, status, Response
+from fastapi import Depends, APIRouter, Query, Request, status, Response
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from api_framework import app_settings
-from api_framework.common.middleware import LogRoute
-from api_framework.user.schemas import UserSchema
+from api_framework.user.schemas import (
+    BulkItemStatus,
+    BulkUserResponseSchema,
+    UserPageSchema,
+    UserSchema,
+)
+from api_framework.common.cache import create_cache
+from api_framework.common.conditional import (
+    is_conditional,
+    is_not_modified,
+    make_etag,
+    not_modified_response,
+    set_validators,
+)
 from api_framework.common.dependencies import CommonHeaders, get_session
+from api_framework.common.pagination import decode_cursor, encode_cursor
+from api_framework.common.responses import ModelResponse
 from api_framework.user.exceptions import UserDoesNotExistError
 from api_framework.user.services import UserService
-from api_framework.user.models import User
+from api_framework.user.models import SearchMode, User
 from api_framework.common.routers import get_healthcheck
 
 
@@ -17,11 +33,27 @@ router = APIRouter(
     tags=[
         "user",
     ],
-    route_class=LogRoute,
 )
 
 logger = logging.getLogger(f"{app_settings.logger_name}.user")
 
+user_cache = create_cache(
+    name="user",
+    ttl=app_settings.user_cache_ttl,
+    max_size=app_settings.user_cache_max_size,
+)
+
+
+def get_user_etag(username: str, modify_date: datetime) -> str:
+    return make_etag(username, modify_date.isoformat())
+
+
+def get_page_etag(versions: list[tuple], limit: int) -> str:
+    # a user added, changed or deleted in the page changes the tag, the page has
+    # no single last modified date since a delete does not move it forward
+    return make_etag(limit, *(f"{name}@{date.isoformat()}" for name, date in versions))
+
+
 router.add_api_route(
     path="/healthcheck",
     endpoint=get_healthcheck,
@@ -35,22 +67,48 @@ router.add_api_route(
 async def create_user(
     data: UserSchema,
     headers: CommonHeaders = Depends(CommonHeaders),
-    session: Session = Depends(get_session),
+    session: Session | AsyncSession = Depends(get_session),
 ):
-    user_service: UserService = UserService(session=session)
+    user_service: UserService = UserService(session=session, cache=user_cache)
     user = await user_service.create_user(user_data=data.model_dump())
-    return user
+    return ModelResponse(
+        UserSchema.dump_attributes(user), status_code=status.HTTP_201_CREATED
+    )
+
+
+@router.post(
+    path="/bulk", response_model=BulkUserResponseSchema, status_code=status.HTTP_200_OK
+)
+async def create_users(
+    data: list[UserSchema],
+    headers: CommonHeaders = Depends(CommonHeaders),
+    session: Session | AsyncSession = Depends(get_session),
+):
+    user_service: UserService = UserService(session=session, cache=user_cache)
+    results = await user_service.create_users(
+        users_data=[user.model_dump() for user in data]
+    )
+    created = sum(result["status"] == BulkItemStatus.CREATED for result in results)
+    return ModelResponse(
+        BulkUserResponseSchema(
+            created=created, failed=len(results) - created, results=results
+        )
+    )
 
 
 @router.put(path="/update", response_model=UserSchema, status_code=status.HTTP_200_OK)
 async def update_user(
     data: UserSchema,
     headers: CommonHeaders = Depends(CommonHeaders),
-    session: Session = Depends(get_session),
+    session: Session | AsyncSession = Depends(get_session),
 ):
-    user_service: UserService = UserService(session=session)
-    user = await user_service.update_user(user_data=data.model_dump(exclude_unset=True))
-    return user
+    user_service: UserService = UserService(session=session, cache=user_cache)
+    user_data = data.model_dump(exclude_unset=True)
+    # the addresses replace the stored ones, so they keep their defaults (type)
+    # and every row of the upsert has the same columns
+    user_data["addresses"] = [address.model_dump() for address in data.addresses]
+    user = await user_service.update_user(user_data=user_data)
+    return ModelResponse(UserSchema.dump_attributes(user))
 
 
 @router.get(
@@ -58,25 +116,73 @@ async def update_user(
 )
 async def get_user(
     username: str,
+    request: Request,
     headers: CommonHeaders = Depends(CommonHeaders),
-    session: Session = Depends(get_session),
+    session: Session | AsyncSession = Depends(get_session),
 ):
-    user_service: UserService = UserService(session=session)
-    user: User = await user_service.get_user(username=username)
-    if not user:
+    user_service: UserService = UserService(session=session, cache=user_cache)
+    if is_conditional(request):
+        # revalidation only reads the modify date, the user and its addresses
+        # are not loaded or serialized for a 304
+        modify_date = await user_service.get_user_modify_date(username=username)
+        if modify_date is None:
+            raise UserDoesNotExistError(f"User with name {username} does not exist")
+        etag = get_user_etag(username, modify_date)
+        if is_not_modified(request, etag, modify_date):
+            return not_modified_response(etag, modify_date)
+    detail = await user_service.get_user_detail(username=username)
+    if not detail:
         raise UserDoesNotExistError(f"User with name {username} does not exist")
-    return user
+    user, modify_date = detail
+    # the detail is already serialized with the aliases of UserSchema
+    response = ModelResponse(user)
+    set_validators(response, get_user_etag(username, modify_date), modify_date)
+    return response
 
 
-@router.get(path="/", response_model=list[UserSchema], status_code=status.HTTP_200_OK)
+@router.get(path="/", response_model=UserPageSchema, status_code=status.HTTP_200_OK)
 async def get_user_all(
+    request: Request,
     search: str | None = None,
+    search_mode: SearchMode = SearchMode.CONTAINS,
+    limit: int = Query(
+        default=app_settings.default_page_size, ge=1, le=app_settings.max_page_size
+    ),
+    cursor: str | None = None,
     headers: CommonHeaders = Depends(CommonHeaders),
-    session: Session = Depends(get_session),
+    session: Session | AsyncSession = Depends(get_session),
 ):
-    user_service: UserService = UserService(session=session)
-    results: list[User] = await user_service.get_user(search=search)
-    return results
+    user_service: UserService = UserService(session=session, cache=user_cache)
+    after = decode_cursor(cursor) if cursor else None
+    # one extra row tells whether there is a next page
+    if is_conditional(request):
+        versions = await user_service.get_user_versions(
+            search=search, search_mode=search_mode, after=after, limit=limit + 1
+        )
+        etag = get_page_etag(versions, limit)
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+    results: list[User] = await user_service.get_user(
+        search=search,
+        search_mode=search_mode,
+        after=after,
+        limit=limit + 1,
+    )
+    versions = [(user.username, user.modify_date) for user in results]
+    next_cursor = None
+    if len(results) > limit:
+        results = results[:limit]
+        next_cursor = encode_cursor(results[-1].username)
+    # the rows were validated by UserSchema when written, they are dumped to the
+    # wire format as they are instead of building a UserSchema for each of them
+    response = ModelResponse(
+        dict(
+            items=[UserSchema.dump_attributes(user) for user in results],
+            next=next_cursor,
+        )
+    )
+    set_validators(response, get_page_etag(versions, limit))
+    return response
 
 
 @router.delete(
@@ -87,7 +193,7 @@ async def get_user_all(
 async def delete_user(
     username: str,
     headers: CommonHeaders = Depends(CommonHeaders),
-    session: Session = Depends(get_session),
+    session: Session | AsyncSession = Depends(get_session),
 ):
-    user_service: UserService = UserService(session=session)
+    user_service: UserService = UserService(session=session, cache=user_cache)
     _ = await user_service.delete_user(username=username)
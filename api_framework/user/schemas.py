@@ -1,4 +1,5 @@
 import re
+from enum import StrEnum
 from typing import Optional, List
 
 from pydantic import model_validator
@@ -38,6 +39,29 @@ class UserSchema(AppBaseSchema):
     status: UserStatus = UserStatus.ACTIVE
 
 
+class UserPageSchema(AppBaseSchema):
+    items: List[UserSchema]
+    next: str | None = None
+
+
+class BulkItemStatus(StrEnum):
+    CREATED: str = "created"
+    FAILED: str = "failed"
+
+
+class BulkUserResultSchema(AppBaseSchema):
+    index: int
+    username: str
+    status: BulkItemStatus
+    message: str | None = None
+
+
+class BulkUserResponseSchema(AppBaseSchema):
+    created: int
+    failed: int
+    results: List[BulkUserResultSchema]
+
+
 def extract_suite_info(address: str) -> str | None:
     # Case-insensitive pattern to match variations of "suite" followed by numbers/letters
     # This handles formats like:
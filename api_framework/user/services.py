@@ -1,94 +1,357 @@
+from datetime import datetime
+
+from sqlalchemy import ColumnElement, delete, func, insert, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from api_framework.common import logger
+from api_framework.common.cache import Cache
+from api_framework.common.services import (
+    BaseService,
+    database_error_message,
+    is_rejected_data,
+)
 from api_framework.user.exceptions import UserAlreadyExistError, UserDoesNotExistError
-from api_framework.user.models import User, UserAddress
+from api_framework.user.models import SearchMode, User, UserAddress
+from api_framework.user.schemas import BulkItemStatus, UserSchema
 
+# columns an address upsert never overwrites, its key on conflict and the
+# identity and creation date of the stored row
+ADDRESS_KEY_COLUMNS = frozenset(("id", "user_id", "type", "create_date"))
 
-class UserService:
-    def __init__(self, session: Session):
-        self.session = session
 
-    async def get_user(
-        self, search: str = None, username: str = None
-    ) -> list[User] | User:
+def escape_like(value: str, escape: str = "/") -> str:
+    for char in (escape, "%", "_"):
+        value = value.replace(char, escape + char)
+    return value
+
+
+def username_search(search: str, search_mode: SearchMode) -> ColumnElement[bool]:
+    """Filter on the username that is served by one of the username indexes"""
+    if search_mode == SearchMode.PREFIX:
+        # lower(username) ~>=~ 'ab' AND lower(username) ~<~ 'ac' is a range scan
+        # on the text_pattern_ops index, also for generic prepared plans where a
+        # LIKE 'ab%' parameter cannot be turned into a range
+        prefix = search.lower()
+        lower_username = func.lower(User.username)
+        condition = lower_username.op("~>=~", is_comparison=True)(prefix)
+        if (next_char := ord(prefix[-1]) + 1) <= 0x10FFFF:
+            if 0xD800 <= next_char <= 0xDFFF:
+                next_char = 0xE000  # surrogates cannot be encoded
+            upper = prefix[:-1] + chr(next_char)
+            condition &= lower_username.op("~<~", is_comparison=True)(upper)
+        return condition
+    # served by the pg_trgm GIN index
+    return User.username.ilike(f"%{escape_like(search)}%", escape="/")
+
+
+class UserService(BaseService):
+    def __init__(self, session: Session | AsyncSession, cache: Cache | None = None):
+        super().__init__(session=session)
+        self.cache = cache
+
+    def get_user_statement(
+        self,
+        search: str = None,
+        username: str = None,
+        after: str = None,
+        limit: int = None,
+        load_addresses: bool = True,
+        search_mode: SearchMode = SearchMode.CONTAINS,
+    ):
         statement = select(User)
+        if load_addresses:
+            # addresses of all returned users are loaded with one extra
+            # "WHERE user_id IN (...)" query instead of one query per user, and
+            # an AsyncSession cannot lazy load them while serializing anyway
+            statement = statement.options(selectinload(User.addresses))
         if search:
-            statement = statement.where(User.username.ilike(f"%{search}%")).order_by(
-                User.username
-            )
+            statement = statement.where(username_search(search, search_mode))
         elif username:
             statement = statement.where(User.username == username)
-        statement = statement.order_by(User.username)
-        results = self.session.exec(statement)
+        if after:
+            # keyset pagination, the unique username index is seeked past the
+            # last row of the previous page instead of skipping an offset
+            statement = statement.where(User.username > after)
+        return statement.order_by(User.username).limit(limit)
+
+    async def get_user(
+        self,
+        search: str = None,
+        username: str = None,
+        after: str = None,
+        limit: int = None,
+        load_addresses: bool = True,
+        search_mode: SearchMode = SearchMode.CONTAINS,
+    ) -> list[User] | User:
+        statement = self.get_user_statement(
+            search=search,
+            username=username,
+            after=after,
+            limit=limit,
+            load_addresses=load_addresses,
+            search_mode=search_mode,
+        )
+        results = await self.exec(statement)
         if username:
             return results.first()
         else:
             return list(results.all())
 
-    async def get_address_by_type(self, address_type: int) -> UserAddress:
-        statement = select(UserAddress).where(UserAddress.type == address_type)
-        address = self.session.exec(statement).first()  # noqa
-        return address
+    async def get_user_versions(
+        self,
+        search: str = None,
+        after: str = None,
+        limit: int = None,
+        search_mode: SearchMode = SearchMode.CONTAINS,
+    ) -> list[tuple[str, datetime]]:
+        """Username and modify date of the users get_user would return, without
+        loading or serializing them
+        """
+        statement = self.get_user_statement(
+            search=search,
+            after=after,
+            limit=limit,
+            load_addresses=False,
+            search_mode=search_mode,
+        ).with_only_columns(User.username, User.modify_date)
+        return [tuple(row) for row in await self.execute(statement)]
+
+    async def get_user_modify_date(self, username: str) -> datetime | None:
+        # every address write goes through update_user, which also updates the
+        # user row, so its modify date versions the user and its addresses
+        statement = select(User.modify_date).where(User.username == username)
+        return (await self.exec(statement)).first()
+
+    async def get_user_detail(self, username: str) -> tuple[dict, datetime] | None:
+        """Serialized user and its modify date read through the cache, writes
+        invalidate the entry
+        """
+        if self.cache and (entry := await self.cache.get(username)) is not None:
+            return entry["user"], datetime.fromisoformat(entry["modify_date"])
+        if (user := await self.get_user(username=username)) is None:
+            return None
+        data = UserSchema.dump_attributes(user)
+        if self.cache:
+            await self.cache.set(
+                username, dict(user=data, modify_date=user.modify_date.isoformat())
+            )
+        return data, user.modify_date
+
+    async def invalidate(self, *usernames: str) -> None:
+        if self.cache:
+            for username in usernames:
+                await self.cache.delete(username)
 
     async def create_user(self, user_data: dict) -> User:
         username = user_data.get("username")
         logger.info("Creating user %s", username)
-        user = await self.get_user(username=username)
+        user_addresses = user_data.pop("addresses")
+
+        # the unique username decides whether the user exists, so no lookup is
+        # needed, and RETURNING fills in the id and dates without a refresh
+        statement = (
+            pg_insert(User)
+            .values(**user_data)
+            .on_conflict_do_nothing(index_elements=[User.username])
+            .returning(User)
+        )
+        user = (await self.execute(statement)).scalars().first()
         logger.debug(f"{user=}")
-        if user:
+        if not user:
+            await self.rollback()
             raise UserAlreadyExistError(
                 message=f"User with name {username} already exists"
             )
 
-        user_addresses = user_data.pop("addresses")
-        user = User(**user_data)
-
-        user.addresses = [
-            UserAddress(
-                **address_data,
-                user_id=user.id,
+        addresses = []
+        if user_addresses:
+            addresses = list(
+                (
+                    await self.execute(
+                        insert(UserAddress).returning(UserAddress),
+                        [dict(address, user_id=user.id) for address in user_addresses],
+                    )
+                ).scalars()
             )
-            for address_data in user_addresses
+        set_committed_value(user, "addresses", addresses)
+        await self.commit()
+        await self.invalidate(username)
+        return user
+
+    async def insert_users(self, users_data: list[dict]) -> set[str]:
+        """Insert the users and their addresses with one batched insert each,
+        returns the usernames created
+        """
+        user_rows = [
+            {k: v for k, v in user_data.items() if k != "addresses"}
+            for user_data in users_data
         ]
+        # a user created concurrently since the lookup is skipped, not raised
+        statement = (
+            pg_insert(User)
+            .on_conflict_do_nothing(index_elements=[User.username])
+            .returning(User.id, User.username)
+        )
+        user_ids = {
+            row.username: row.id for row in await self.execute(statement, user_rows)
+        }
+        address_rows = [
+            dict(address_data, user_id=user_ids[user_data["username"]])
+            for user_data in users_data
+            if user_data["username"] in user_ids
+            for address_data in user_data.get("addresses") or []
+        ]
+        if address_rows:
+            await self.execute(insert(UserAddress), address_rows)
+        return set(user_ids)
 
-        self.session.add(user)
-        self.session.commit()
-        self.session.refresh(user)
-        return user
+    async def create_users(self, users_data: list[dict]) -> list[dict]:
+        """Create many users in one transaction.
+
+        Existing usernames are looked up with a single query and users and
+        addresses are each written with one batched insert.  Rows that cannot
+        be created are reported in the returned per-item results instead of
+        failing the whole batch: when the database rejects the batch the rows
+        are inserted again one by one, each in its own savepoint.
+        """
+        logger.info("Creating %s users", len(users_data))
+        results = [
+            dict(index=index, username=user_data.get("username"))
+            for index, user_data in enumerate(users_data)
+        ]
+        usernames = [result["username"] for result in results]
+        existing = set(
+            (
+                await self.exec(
+                    select(User.username).where(User.username.in_(usernames))
+                )
+            ).all()
+        )
+
+        pending: dict[str, int] = {}
+        for result in results:
+            username = result["username"]
+            if username in existing:
+                result.update(
+                    status=BulkItemStatus.FAILED,
+                    message=f"User with name {username} already exists",
+                )
+            elif username in pending:
+                result.update(
+                    status=BulkItemStatus.FAILED,
+                    message=f"User with name {username} is repeated in the request",
+                )
+            else:
+                pending[username] = result["index"]
+
+        created: set[str] = set()
+        errors: dict[str, str] = {}
+        if pending:
+            batch = [users_data[index] for index in pending.values()]
+            try:
+                async with self.savepoint():
+                    created = await self.insert_users(batch)
+            except DBAPIError as e:
+                if not is_rejected_data(e):
+                    raise
+                logger.info("Batch of users rejected, creating them one by one")
+                for user_data in batch:
+                    try:
+                        async with self.savepoint():
+                            created |= await self.insert_users([user_data])
+                    except DBAPIError as error:
+                        if not is_rejected_data(error):
+                            raise
+                        errors[user_data["username"]] = database_error_message(error)
+        await self.commit()
+        await self.invalidate(*created)
+
+        for username, index in pending.items():
+            if username in created:
+                results[index].update(status=BulkItemStatus.CREATED)
+            elif username in errors:
+                results[index].update(
+                    status=BulkItemStatus.FAILED,
+                    message=f"User with name {username} could not be created: "
+                    f"{errors[username]}",
+                )
+            else:
+                results[index].update(
+                    status=BulkItemStatus.FAILED,
+                    message=f"User with name {username} already exists",
+                )
+        return results
 
     async def update_user(self, user_data: dict):
         username = user_data.get("username")
-        user = await self.get_user(username=username)
+        user_addresses = user_data.pop("addresses")
+        # UPDATE ... RETURNING both checks the user exists and returns the new
+        # modify_date, so there is no lookup before or refresh after the write
+        statement = (
+            update(User)
+            .where(User.username == username)
+            .values(**user_data)
+            .returning(User)
+            .execution_options(populate_existing=True)
+        )
+        user = (await self.execute(statement)).scalars().first()
         if not user:
             raise UserDoesNotExistError(
                 message=f"User with name {username} doesn't exist"
             )
-        user_addresses = user_data.pop("addresses")
-        user.sqlmodel_update(user_data)
-
-        updated_addresses = []
-        for address in user_addresses:
-            existing_address = await self.get_address_by_type(address.get("type"))
-            if existing_address:
-                existing_address.sqlmodel_update(address)
-                updated_addresses.append(existing_address)
-            else:
-                updated_addresses.append(UserAddress(**address))
 
-        user.addresses = updated_addresses
-        self.session.add(user)
-        self.session.commit()
-        self.session.refresh(user)
+        # the addresses are reconciled with one upsert on the (user_id, type)
+        # constraint and one delete of the types no longer sent, however many
+        # addresses the user has
+        addresses = []
+        if user_addresses:
+            statement = pg_insert(UserAddress)
+            statement = (
+                statement.on_conflict_do_update(
+                    constraint="user_address_user_id_type_key",
+                    set_={
+                        column.name: statement.excluded[column.name]
+                        for column in UserAddress.__table__.columns
+                        if column.name not in ADDRESS_KEY_COLUMNS
+                    },
+                )
+                .returning(UserAddress)
+                .execution_options(populate_existing=True)
+            )
+            addresses = list(
+                (
+                    await self.execute(
+                        statement,
+                        [dict(address, user_id=user.id) for address in user_addresses],
+                    )
+                ).scalars()
+            )
+        await self.execute(
+            delete(UserAddress).where(
+                UserAddress.user_id == user.id,
+                UserAddress.type.not_in(
+                    [address["type"] for address in user_addresses]
+                ),
+            )
+        )
+        set_committed_value(user, "addresses", addresses)
+        await self.commit()
+        await self.invalidate(username)
         return user
 
     async def delete_user(self, username: str) -> User:
         if not (user := await self.get_user(username=username)):
             raise UserDoesNotExistError
-        self.session.delete(user)
-        self.session.commit()
+        await self.delete(user)
+        await self.commit()
+        await self.invalidate(username)
         return user
 
-    def save_user(self, user: User) -> None:
+    async def save_user(self, user: User) -> None:
         self.session.add(user)
-        self.session.commit()
+        await self.commit()
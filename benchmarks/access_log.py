@@ -0,0 +1,121 @@
+"""Per-request overhead of the access log.
+
+Calls a FastAPI app directly through ASGI, without a server or database, with
+no access log, with the previous ``APIRoute`` subclass that attached a
+``BackgroundTask`` per request, and with ``AccessLogMiddleware``.  Log records
+are formatted into memory so only the cost of producing them is measured.
+
+    python -m benchmarks.access_log --requests 5000 --rounds 5
+"""
+
+import argparse
+import asyncio
+import io
+import logging
+import time
+
+from fastapi import APIRouter, FastAPI, Request
+from fastapi.routing import APIRoute
+from starlette.background import BackgroundTask
+
+from api_framework.common.middleware import AccessLogMiddleware, logger
+
+
+async def log_request_info(request: Request, response) -> None:
+    logger.info(
+        "%s %s %s %s Headers=%s Path Params=%s Query Params=%s",
+        request.method,
+        request.url.path,
+        request.url.scheme,
+        response.status_code,
+        [{k: v} for k, v in request.headers.items() if k.startswith("x")],
+        request.path_params,
+        request.query_params or "None",
+    )
+
+
+class BackgroundLogRoute(APIRoute):
+    """The access log as it was done before ``AccessLogMiddleware``"""
+
+    def get_route_handler(self):
+        original_route_handler = super().get_route_handler()
+
+        async def custom_route_handler(request: Request):
+            response = await original_route_handler(request)
+            response.background = BackgroundTask(log_request_info, request, response)
+            return response
+
+        return custom_route_handler
+
+
+def create_app(access_log: str) -> FastAPI:
+    app = FastAPI()
+    router = APIRouter(
+        route_class=BackgroundLogRoute if access_log == "route" else APIRoute
+    )
+
+    @router.get("/user/{username}")
+    async def get_user(username: str):
+        return dict(username=username, lastName="Benchmark", addresses=[])
+
+    app.include_router(router)
+    if access_log == "middleware":
+        app.add_middleware(AccessLogMiddleware)
+    return app
+
+
+async def call(app: FastAPI) -> None:
+    scope = dict(
+        type="http",
+        asgi=dict(version="3.0"),
+        http_version="1.1",
+        method="GET",
+        scheme="http",
+        path="/user/alice",
+        raw_path=b"/user/alice",
+        root_path="",
+        query_string=b"",
+        headers=[(b"host", b"bench"), (b"x-tenant-id", b"bench")],
+        client=("127.0.0.1", 1234),
+        server=("bench", 80),
+    )
+
+    async def receive():
+        return dict(type="http.request", body=b"", more_body=False)
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def run(requests: int, rounds: int) -> None:
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    logger.addHandler(logging.StreamHandler(io.StringIO()))
+
+    apps = {
+        access_log: create_app(access_log)
+        for access_log in ("none", "route", "middleware")
+    }
+    # the rounds are interleaved and the best one is kept to smooth out noise
+    best = dict.fromkeys(apps, float("inf"))
+    for _ in range(rounds):
+        for access_log, app in apps.items():
+            start = time.perf_counter()
+            for _ in range(requests):
+                await call(app)
+            elapsed = (time.perf_counter() - start) * 1_000_000 / requests
+            best[access_log] = min(best[access_log], elapsed)
+
+    print(f"{'access log':<12}{'us/request':>12}{'overhead':>12}")
+    for access_log, elapsed in best.items():
+        print(f"{access_log:<12}{elapsed:>12.1f}{elapsed - best['none']:>12.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.rounds))
@@ -0,0 +1,75 @@
+"""Records per second of the JSON log formatters.
+
+Formats the same log record with ``jsonformatter.JsonFormatter`` and with
+``JsonLogFormatter`` using the ``json_log_format`` of the settings, with the
+stdlib encoder and with orjson when it is installed.
+
+    python -m benchmarks.log_formatter --records 50000
+"""
+
+import argparse
+import logging
+import time
+from unittest.mock import patch
+
+from jsonformatter import JsonFormatter
+
+from api_framework import app_settings
+from api_framework.common.encoders import orjson
+from api_framework.logger_conf import JsonLogFormatter
+
+DATEFMT = "%Y-%m-%d %H:%M:%S"
+
+
+def make_record() -> logging.LogRecord:
+    record = logging.LogRecord(
+        "api-logger.access",
+        logging.INFO,
+        __file__,
+        1,
+        "%s %s %s %s",
+        ("GET", "/framework/api/v1/user/alice", "http", 200),
+        None,
+        "run",
+    )
+    record.request_id = "5f0c6a8e2b7d4e1f"
+    return record
+
+
+def measure(formatter: logging.Formatter, records: int) -> float:
+    record = make_record()
+    start = time.perf_counter()
+    for _ in range(records):
+        formatter.format(record)
+    return records / (time.perf_counter() - start)
+
+
+def run(records: int) -> None:
+    builtin = JsonLogFormatter(
+        fmt=app_settings.json_log_format,
+        datefmt=DATEFMT,
+        extra_fields=app_settings.json_log_extra_fields,
+    )
+    formatters = {
+        "jsonformatter": lambda: measure(
+            JsonFormatter(app_settings.json_log_format, datefmt=DATEFMT), records
+        ),
+        "builtin json": lambda: measure_stdlib(builtin, records),
+    }
+    if orjson is not None:
+        formatters["builtin orjson"] = lambda: measure(builtin, records)
+
+    print(f"{'formatter':<16}{'records/s':>12}")
+    for name, call in formatters.items():
+        print(f"{name:<16}{call():>12,.0f}")
+
+
+def measure_stdlib(formatter: logging.Formatter, records: int) -> float:
+    with patch("api_framework.common.encoders.orjson", None):
+        return measure(formatter, records)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=50000)
+    run(parser.parse_args().records)
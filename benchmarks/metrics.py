@@ -0,0 +1,126 @@
+"""Per-request overhead of the Prometheus metrics.
+
+Calls a FastAPI app directly through ASGI, without a server or database, with
+and without ``MetricsMiddleware``, both behind ``RequestContextMiddleware``,
+then the middleware alone around a bare ASGI app, which leaves out the noise
+of the rest of the stack. Run it with ``PROMETHEUS_MULTIPROC_DIR`` set to
+measure the memory mapped store shared by the gunicorn workers.
+
+    python -m benchmarks.metrics --requests 5000 --rounds 5
+    PROMETHEUS_MULTIPROC_DIR=$(mktemp -d) python -m benchmarks.metrics
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from fastapi import APIRouter, FastAPI
+from fastapi.routing import APIRoute
+from prometheus_client import CollectorRegistry
+
+from api_framework.common.context import QueryStats, query_stats_var
+from api_framework.common.metrics import MetricsMiddleware, RequestMetrics
+from api_framework.common.middleware import RequestContextMiddleware
+
+
+def create_app(metrics: bool) -> FastAPI:
+    app = FastAPI()
+    router = APIRouter()
+
+    @router.get("/user/{username}")
+    async def get_user(username: str):
+        return dict(username=username, lastName="Benchmark", addresses=[])
+
+    app.include_router(router)
+    if metrics:
+        app.add_middleware(
+            MetricsMiddleware, metrics=RequestMetrics(registry=CollectorRegistry())
+        )
+    app.add_middleware(RequestContextMiddleware)
+    return app
+
+
+async def call(app: FastAPI) -> None:
+    scope = dict(
+        type="http",
+        asgi=dict(version="3.0"),
+        http_version="1.1",
+        method="GET",
+        scheme="http",
+        path="/user/alice",
+        raw_path=b"/user/alice",
+        root_path="",
+        query_string=b"",
+        headers=[(b"host", b"bench")],
+        client=("127.0.0.1", 1234),
+        server=("bench", 80),
+    )
+
+    async def receive():
+        return dict(type="http.request", body=b"", more_body=False)
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def bare_app(scope, receive, send):
+    scope["route"] = BARE_ROUTE
+    await send(dict(type="http.response.start", status=200, headers=[]))
+    await send(dict(type="http.response.body", body=b"{}"))
+
+
+BARE_ROUTE = APIRoute("/user/{username}", bare_app)
+
+
+async def best_times(apps: dict, requests: int, rounds: int, request) -> dict:
+    # the rounds are interleaved and the best one is kept to smooth out noise
+    best = dict.fromkeys(apps, float("inf"))
+    for _ in range(rounds):
+        for name, app in apps.items():
+            start = time.perf_counter()
+            for _ in range(requests):
+                await request(app)
+            elapsed = (time.perf_counter() - start) * 1_000_000 / requests
+            best[name] = min(best[name], elapsed)
+    return best
+
+
+async def call_bare(app) -> None:
+    async def receive():
+        return dict(type="http.request", body=b"", more_body=False)
+
+    async def send(message):
+        pass
+
+    await app(dict(type="http", method="GET", path="/user/alice"), receive, send)
+
+
+def report(title: str, best: dict) -> None:
+    baseline = next(iter(best.values()))
+    print(f"{title:<12}{'us/request':>12}{'overhead':>12}")
+    for name, elapsed in best.items():
+        print(f"{name:<12}{elapsed:>12.1f}{elapsed - baseline:>12.1f}")
+
+
+async def run(requests: int, rounds: int) -> None:
+    store = "multiprocess" if os.environ.get("PROMETHEUS_MULTIPROC_DIR") else "memory"
+    print(f"store: {store}")
+    apps = {"none": create_app(False), "metrics": create_app(True)}
+    report("app", await best_times(apps, requests, rounds, call))
+    query_stats_var.set(QueryStats())
+    middleware = MetricsMiddleware(
+        bare_app, metrics=RequestMetrics(registry=CollectorRegistry())
+    )
+    bare = {"none": bare_app, "metrics": middleware}
+    report("middleware", await best_times(bare, requests * 4, rounds, call_bare))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.rounds))
@@ -0,0 +1,157 @@
+"""Serialization cost of the user listing endpoint.
+
+Calls ``GET /user/`` of the user router directly through ASGI with
+``UserService.get_user`` returning a page of in-memory users, so the database
+in ``DATABASE_URL`` is never connected to. The previous route, which returned
+a dict for FastAPI to validate against ``response_model`` and encode with
+``JSONResponse``, and the validated route, which returned a ``ModelResponse``
+of a ``UserPageSchema`` built from the rows, are compared with the current one
+that dumps the rows with ``UserSchema.dump_attributes``. The bodies of all the
+routes must be equal.
+
+    python -m benchmarks.user_listing --users 100 --requests 300
+"""
+
+import argparse
+import asyncio
+import time
+from unittest.mock import patch
+
+from fastapi import APIRouter, Depends, FastAPI
+from fastapi.responses import JSONResponse
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from api_framework.common.dependencies import CommonHeaders, get_session
+from api_framework.common.responses import ModelResponse
+from api_framework.user.models import User, UserAddress
+from api_framework.user.routers import router as user_router
+from api_framework.user.schemas import UserPageSchema
+from api_framework.user.services import UserService
+
+
+def make_users(users: int) -> list[User]:
+    return [
+        User(
+            username=f"user{i:05}",
+            first_name="Bench",
+            last_name="Mark",
+            email=f"user{i}@example.com",
+            status="active",
+            addresses=[
+                UserAddress(
+                    type=address_type,
+                    address_line_1=f"{address_type} Main Street",
+                    city="Springfield",
+                    state="IL",
+                    postal_code="62701",
+                )
+                for address_type in (1, 2)
+            ],
+        )
+        for i in range(users)
+    ]
+
+
+def create_app(route: str) -> FastAPI:
+    if route == "current":
+        app = FastAPI()
+        app.include_router(user_router, prefix="/user")
+    elif route == "validated":
+        app = FastAPI()
+        router = APIRouter()
+
+        @router.get("/", response_model=UserPageSchema)
+        async def get_user_all(
+            search: str | None = None,
+            limit: int = 100,
+            headers: CommonHeaders = Depends(CommonHeaders),
+            session: Session | AsyncSession = Depends(get_session),
+        ):
+            user_service = UserService(session=session)
+            results = await user_service.get_user(search=search, limit=limit + 1)
+            return ModelResponse(UserPageSchema(items=results[:limit], next=None))
+
+        app.include_router(router, prefix="/user")
+    else:
+        app = FastAPI(default_response_class=JSONResponse)
+        router = APIRouter()
+
+        @router.get("/", response_model=UserPageSchema)
+        async def get_user_all(
+            search: str | None = None,
+            limit: int = 100,
+            headers: CommonHeaders = Depends(CommonHeaders),
+            session: Session | AsyncSession = Depends(get_session),
+        ):
+            user_service = UserService(session=session)
+            results = await user_service.get_user(search=search, limit=limit + 1)
+            return dict(items=results[:limit], next=None)
+
+        app.include_router(router, prefix="/user")
+    return app
+
+
+async def call(app: FastAPI, query_string: bytes) -> bytes:
+    scope = dict(
+        type="http",
+        asgi=dict(version="3.0"),
+        http_version="1.1",
+        method="GET",
+        scheme="http",
+        path="/user/",
+        raw_path=b"/user/",
+        root_path="",
+        query_string=query_string,
+        headers=[(b"host", b"bench")],
+        client=("127.0.0.1", 1234),
+        server=("bench", 80),
+    )
+    body = bytearray()
+
+    async def receive():
+        return dict(type="http.request", body=b"", more_body=False)
+
+    async def send(message):
+        body.extend(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return bytes(body)
+
+
+async def run(users: int, requests: int, rounds: int) -> None:
+    page = make_users(users)
+
+    async def get_user(self, **kwargs):
+        return page
+
+    query_string = f"limit={users}".encode()
+    apps = {route: create_app(route) for route in ("previous", "validated", "current")}
+    best = dict.fromkeys(apps, float("inf"))
+    bodies = {}
+    with patch.object(UserService, "get_user", get_user):
+        # the rounds are interleaved and the best one is kept to smooth out noise
+        for _ in range(rounds):
+            for route, app in apps.items():
+                start = time.perf_counter()
+                for _ in range(requests):
+                    bodies[route] = await call(app, query_string)
+                elapsed = (time.perf_counter() - start) * 1000 / requests
+                best[route] = min(best[route], elapsed)
+
+    print(f"{'route':<10}{'ms/request':>12}{'bytes':>10}")
+    for route, elapsed in best.items():
+        print(f"{route:<10}{elapsed:>12.3f}{len(bodies[route]):>10}")
+    equal = len(set(bodies.values())) == 1
+    print(f"equal output: {'yes' if equal else 'no'}")
+    if not equal:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.requests, args.rounds))
@@ -0,0 +1,96 @@
+from unittest.mock import patch
+
+from api_framework import app_settings
+from api_framework.common.cache import (
+    ALL_CACHES,
+    LRUCache,
+    SharedCache,
+    get_cache_url,
+)
+
+
+class FakeCacheClient:
+    def __init__(self):
+        self.data = {}
+        self.expiry = {}
+
+    async def get(self, name):
+        return self.data.get(name)
+
+    async def set(self, name, value, ex=None):
+        self.data[name] = value
+        self.expiry[name] = ex
+
+    async def delete(self, *names):
+        for name in names:
+            self.data.pop(name, None)
+
+
+class TestCache:
+    async def test_lru_cache(self):
+        """
+        GIVEN an in-process cache with a max size of two
+        WHEN a third key is set and keys are read and deleted
+        THEN the least recently used key is evicted and the counters are updated
+        """
+        cache = LRUCache(name="test-lru", ttl=30, max_size=2)
+        await cache.set("a", {"value": 1})
+        await cache.set("b", {"value": 2})
+        assert await cache.get("a") == {"value": 1}
+        await cache.set("c", {"value": 3})
+        assert await cache.get("b") is None
+        assert await cache.get("c") == {"value": 3}
+        await cache.delete("c")
+        assert await cache.get("c") is None
+        assert cache.stats() == dict(
+            name="test-lru",
+            backend="LRUCache",
+            hits=2,
+            misses=2,
+            evictions=1,
+            size=1,
+            max_size=2,
+        )
+        assert ALL_CACHES["test-lru"] is cache
+
+    async def test_lru_cache_expiry(self):
+        """
+        GIVEN an in-process cache entry
+        WHEN it is read after the ttl has passed
+        THEN it is a miss and the entry is evicted
+        """
+        cache = LRUCache(name="test-lru-expiry", ttl=30, max_size=2)
+        with patch("api_framework.common.cache.time.monotonic", return_value=100):
+            await cache.set("a", {"value": 1})
+        with patch("api_framework.common.cache.time.monotonic", return_value=131):
+            assert await cache.get("a") is None
+        assert cache.stats()["evictions"] == 1
+        assert cache.stats()["size"] == 0
+
+    async def test_shared_cache(self):
+        """
+        GIVEN a shared cache backed by a key/value client
+        WHEN a value is set, read and deleted
+        THEN it is stored as JSON under a namespaced key with the ttl as expiry
+        """
+        client = FakeCacheClient()
+        cache = SharedCache(name="test-shared", ttl=30, client=client)
+        await cache.set("a", {"value": 1})
+        assert client.data == {"test-shared:a": b'{"value": 1}'}
+        assert client.expiry == {"test-shared:a": 30}
+        assert await cache.get("a") == {"value": 1}
+        await cache.delete("a")
+        assert await cache.get("a") is None
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_get_cache_url(self, monkeypatch):
+        """
+        GIVEN a cache url with a password placeholder
+        WHEN the url of the cache client is built
+        THEN the password is filled in from its own setting
+        """
+        monkeypatch.setattr(app_settings, "cache_url", "redis://:{pswd}@cache:6379/0")
+        monkeypatch.setattr(app_settings, "cache_password", "secret")
+        assert get_cache_url() == "redis://:secret@cache:6379/0"
+        monkeypatch.setattr(app_settings, "cache_url", None)
+        assert get_cache_url() is None
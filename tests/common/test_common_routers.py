@@ -1,3 +1,7 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
 from api_framework import app_settings
 
 
@@ -16,6 +20,20 @@ class TestCommonRoutes:
         assert actual_response.status_code == expected_status_code
         assert actual_response.json() == expected_response
 
+    def test_get_info_hides_passwords(self, client, monkeypatch):
+        """
+        GIVEN a cache url whose password is in its own setting
+        WHEN get_info endpoint is called
+        THEN the url is returned with its placeholder and no password is
+        """
+        monkeypatch.setattr(app_settings, "cache_url", "redis://:{pswd}@cache:6379/0")
+        monkeypatch.setattr(app_settings, "cache_password", "cache-secret")
+        monkeypatch.setattr(app_settings, "database_password", "database-secret")
+        response = client.get(f"{app_settings.base_url_prefix}/common/info")
+        assert response.json()["cache_url"] == "redis://:{pswd}@cache:6379/0"
+        assert "cache_password" not in response.json()
+        assert "secret" not in response.text
+
     def test_get_healthcheck(self, client):
         """
         GIVEN client is up and running
@@ -29,3 +47,102 @@ class TestCommonRoutes:
         )
         assert actual_response.status_code == expected_status_code
         assert actual_response.json() == expected_response
+
+    def test_get_liveness(self, client):
+        """
+        GIVEN client is up and running
+        WHEN get_liveness endpoint is called
+        THEN it answers without checking the database
+        """
+        actual_response = client.get(f"{app_settings.base_url_prefix}/common/liveness")
+        assert actual_response.status_code == 200
+        assert actual_response.json() == {"msg": "Happy"}
+
+    @pytest.mark.parametrize("ready, expected_status_code", [(True, 200), (False, 503)])
+    def test_get_readiness(self, client, ready, expected_status_code):
+        """
+        GIVEN the readiness checks pass or fail
+        WHEN get_readiness endpoint is called
+        THEN it returns the checks, with a 503 when the worker is not ready
+        """
+        result = dict(
+            ready=ready, checks=[dict(name="database", ok=ready, detail="SELECT 1")]
+        )
+        with patch(
+            "api_framework.common.routers.readiness_probe.get",
+            AsyncMock(return_value=result),
+        ):
+            actual_response = client.get(
+                f"{app_settings.base_url_prefix}/common/readiness"
+            )
+        assert actual_response.status_code == expected_status_code
+        assert actual_response.json() == result
+
+    def test_get_pool(self, client):
+        """
+        GIVEN client is up and running
+        WHEN get_pool endpoint is called
+        THEN it returns the connection counts of the worker's engine pool
+        """
+        actual_response = client.get(f"{app_settings.base_url_prefix}/common/pool")
+        assert actual_response.status_code == 200
+        data = actual_response.json()
+        assert data["size"] == app_settings.database_pool_size
+        assert data["maxOverflow"] == app_settings.database_max_overflow
+        assert data["checkedOut"] == 0
+        assert data["overflow"] == 0
+        assert {"pid", "poolClass", "idle"} <= data.keys()
+
+    def test_get_cache(self, client):
+        """
+        GIVEN client is up and running
+        WHEN get_cache endpoint is called
+        THEN it returns the counters of the user detail cache
+        """
+        actual_response = client.get(f"{app_settings.base_url_prefix}/common/cache")
+        assert actual_response.status_code == 200
+        user_cache = next(c for c in actual_response.json() if c["name"] == "user")
+        assert user_cache["backend"] == "LRUCache"
+        assert user_cache["maxSize"] == app_settings.user_cache_max_size
+        assert {"hits", "misses", "evictions", "size"} <= user_cache.keys()
+
+    def test_get_log_queue(self, client):
+        """
+        GIVEN client is up and running
+        WHEN get_log_queue endpoint is called
+        THEN it returns the depth and drop count of the queued log handlers
+        """
+        actual_response = client.get(f"{app_settings.base_url_prefix}/common/log-queue")
+        assert actual_response.status_code == 200
+        for handler in actual_response.json():
+            assert {"policy", "depth", "maxSize", "dropped"} <= handler.keys()
+
+    def test_get_metrics(self, client):
+        """
+        GIVEN client is up and running with the metrics enabled
+        WHEN get_metrics endpoint is called
+        THEN it returns the request metrics in the Prometheus text format
+        """
+        pytest.importorskip("prometheus_client")
+        client.get(f"{app_settings.base_url_prefix}/common/pool")
+        actual_response = client.get(f"{app_settings.base_url_prefix}/common/metrics")
+        assert actual_response.status_code == 200
+        assert actual_response.headers["content-type"].startswith("text/plain")
+        assert (
+            'http_request_duration_seconds_count{method="GET",'
+            f'route="{app_settings.base_url_prefix}/common/pool",status="200"}}'
+        ) in actual_response.text
+        assert "http_requests_in_flight" in actual_response.text
+
+    def test_get_metrics_disabled(self, client):
+        """
+        GIVEN the metrics are disabled
+        WHEN get_metrics endpoint is called
+        THEN it returns a not found error
+        """
+        with patch("api_framework.common.routers.request_metrics", None):
+            actual_response = client.get(
+                f"{app_settings.base_url_prefix}/common/metrics"
+            )
+        assert actual_response.status_code == 404
+        assert actual_response.json()["errors"][0]["code"] == "common.error.012"
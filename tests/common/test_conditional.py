@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+
+from starlette.requests import Request
+
+from api_framework.common.conditional import (
+    http_date,
+    is_conditional,
+    is_not_modified,
+    make_etag,
+)
+
+
+def make_request(**headers) -> Request:
+    return Request(
+        dict(
+            type="http",
+            headers=[
+                (name.replace("_", "-").encode(), value.encode())
+                for name, value in headers.items()
+            ],
+        )
+    )
+
+
+class TestConditional:
+    def test_make_etag(self):
+        """
+        GIVEN the values that version a representation
+        WHEN an etag is made from them
+        THEN it is a stable weak etag that changes with any of the values
+        """
+        etag = make_etag("alice", "2025-01-01T00:00:00")
+        assert etag.startswith('W/"') and etag.endswith('"')
+        assert etag == make_etag("alice", "2025-01-01T00:00:00")
+        assert etag != make_etag("alice", "2025-01-01T00:00:01")
+
+    def test_if_none_match(self):
+        """
+        GIVEN a request with an If-None-Match header
+        WHEN it is evaluated against the current etag
+        THEN it is not modified for a matching, weakly matching or wildcard tag and
+        If-Modified-Since is ignored
+        """
+        etag = make_etag("alice")
+        strong = etag.removeprefix("W/")
+        assert is_not_modified(make_request(if_none_match=etag), etag)
+        assert is_not_modified(make_request(if_none_match=f'"x", {strong}'), etag)
+        assert is_not_modified(make_request(if_none_match="*"), etag)
+        request = make_request(
+            if_none_match='"x"', if_modified_since=http_date(datetime.now())
+        )
+        assert is_conditional(request)
+        assert not is_not_modified(request, etag, datetime.now() - timedelta(days=1))
+
+    def test_if_modified_since(self):
+        """
+        GIVEN a request with an If-Modified-Since header
+        WHEN it is evaluated against the last modified date
+        THEN it is not modified unless the date is later, at second precision
+        """
+        modify_date = datetime(2025, 1, 1, 12, 0, 0, 500000)
+        request = make_request(if_modified_since=http_date(modify_date))
+        assert is_not_modified(request, make_etag(), modify_date)
+        assert not is_not_modified(
+            request, make_etag(), modify_date + timedelta(seconds=1)
+        )
+        assert not is_not_modified(
+            make_request(if_modified_since="yesterday"), make_etag(), modify_date
+        )
+        assert not is_conditional(make_request())
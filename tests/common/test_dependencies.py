@@ -0,0 +1,118 @@
+import logging
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine, make_url, text
+
+from api_framework import app_settings
+from api_framework.common import dependencies
+from api_framework.common.context import QueryStats, query_stats_var
+from api_framework.common.dependencies import get_database_url, is_async_url
+
+
+@pytest.fixture(scope="function")
+def caplog(caplog):
+    # the app loggers do not propagate to the root logger caplog listens on
+    dependencies.logger.addHandler(caplog.handler)
+    with patch.object(dependencies.logger, "propagate", False):
+        yield caplog
+    dependencies.logger.removeHandler(caplog.handler)
+
+
+class TestDatabaseUrl:
+    def test_is_async_url(self):
+        """
+        GIVEN database urls with sync and async drivers
+        WHEN is_async_url is called
+        THEN only the asyncpg url is reported as async
+        """
+        assert is_async_url(make_url("postgresql+asyncpg://api:pswd@db:5432/api"))
+        assert not is_async_url(make_url("postgresql+psycopg2://api:pswd@db:5432/api"))
+
+    def test_get_database_url_sync(self, monkeypatch):
+        """
+        GIVEN the database url uses the asyncpg driver
+        WHEN get_database_url is called for a sync connection
+        THEN the default sync driver is used with the password filled in
+        """
+        monkeypatch.setattr(
+            app_settings, "database_url", "postgresql+asyncpg://api:{pswd}@db:5432/api"
+        )
+        monkeypatch.setattr(app_settings, "database_password", "secret")
+        assert get_database_url().drivername == "postgresql+asyncpg"
+        url = get_database_url(sync=True)
+        assert url.drivername == "postgresql"
+        assert url.password == "secret"
+
+
+class TestEngine:
+    def test_reset_pool_after_fork(self):
+        """
+        GIVEN the engine created before the workers are forked
+        WHEN a worker is forked
+        THEN its engine gets a new pool instead of sharing the connections
+        """
+        sync_engine = dependencies.get_sync_engine()
+        pool = sync_engine.pool
+        dependencies.reset_pool_after_fork()
+        assert sync_engine.pool is not pool
+
+    def test_instrument_engine(self):
+        """
+        GIVEN an instrumented engine and the query stats of a request
+        WHEN statements are run
+        THEN they are counted with the time they took
+        """
+        engine = create_engine("sqlite://")
+        dependencies.instrument_engine(engine)
+        stats = QueryStats()
+        token = query_stats_var.set(stats)
+        try:
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+                connection.execute(text("SELECT 2"))
+        finally:
+            query_stats_var.reset(token)
+        assert stats.count == 2
+        assert stats.duration > 0
+
+    def test_slow_query_log(self, caplog):
+        """
+        GIVEN an instrumented engine and a slow query threshold of 0ms
+        WHEN a request runs a statement
+        THEN it is logged with the method and route of the request
+        """
+        engine = create_engine("sqlite://")
+        dependencies.instrument_engine(engine)
+        route = SimpleNamespace(path="/user/{username}")
+        stats = QueryStats(dict(method="GET", path="/user/alice", route=route))
+        token = query_stats_var.set(stats)
+        try:
+            with (
+                patch.object(app_settings, "database_slow_query_ms", 0.000001),
+                caplog.at_level(logging.WARNING, logger=dependencies.logger.name),
+                engine.connect() as connection,
+            ):
+                connection.execute(text("SELECT 1"))
+        finally:
+            query_stats_var.reset(token)
+        [record] = caplog.records
+        assert record.getMessage().startswith("slow query ")
+        assert record.getMessage().endswith(" in GET /user/{username}: SELECT 1")
+
+    def test_slow_query_log_disabled(self, caplog):
+        """
+        GIVEN an instrumented engine and DATABASE_SLOW_QUERY_MS set to 0
+        WHEN a statement is run outside of a request
+        THEN nothing is logged
+        """
+        engine = create_engine("sqlite://")
+        dependencies.instrument_engine(engine)
+        with (
+            patch.object(app_settings, "database_slow_query_ms", 0),
+            caplog.at_level(logging.WARNING, logger=dependencies.logger.name),
+            engine.connect() as connection,
+        ):
+            connection.execute(text("SELECT 1"))
+        assert caplog.records == []
@@ -0,0 +1,154 @@
+import json
+import logging
+from dataclasses import dataclass
+from unittest.mock import patch
+
+import pytest
+
+from api_framework import app_settings
+from api_framework.common.errors import (
+    ErrorLogLimiter,
+    UNKNOWN_ERROR_BODY,
+    app_error_response,
+)
+from api_framework.exceptions import ERROR_CODES, AppBaseError, InvalidActionError
+from api_framework.user.exceptions import UserDoesNotExistError
+
+
+class TestErrorResponses:
+    def test_existing_error(self, client):
+        """
+        GIVEN a route raising a known error
+        WHEN it is called
+        THEN the prebuilt response of the error class is returned
+        """
+        response = client.get("/test-existing-error")
+        assert response.status_code == 400
+        assert response.json() == {
+            "errors": [
+                dict(
+                    type="InvalidActionError",
+                    code=InvalidActionError().code,
+                    message="Invalid action provided",
+                    http_code=400,
+                )
+            ]
+        }
+        assert response.content == app_error_response(InvalidActionError()).body
+
+    def test_error_message(self):
+        """
+        GIVEN a known error raised with its own message
+        WHEN its response is built
+        THEN the message replaces the default one of the template
+        """
+        response = app_error_response(UserDoesNotExistError("User alice is gone"))
+        assert response.status_code == 404
+        assert b'"message":"User alice is gone"' in response.body
+        assert b'"type":"UserDoesNotExistError"' in response.body
+
+    def test_non_existing_error(self, client):
+        """
+        GIVEN a route raising an unexpected error
+        WHEN it is called, with and without debug mode
+        THEN the message and traceback are only returned in debug mode
+        """
+        response = client.get("/test-non-existing-error")
+        assert response.status_code == 500
+        assert response.content == UNKNOWN_ERROR_BODY
+        assert "traceback" not in response.text
+
+        with patch.object(app_settings, "debug_mode", True):
+            response = client.get("/test-non-existing-error")
+        assert response.status_code == 500
+        (error,) = response.json()["errors"]
+        assert error["type"] == "ValueError"
+        assert error["message"] == "This end point results in an error"
+        assert "Traceback" in error["traceback"]
+
+
+class TestErrorRegistry:
+    def test_codes(self):
+        """
+        GIVEN the error classes
+        WHEN their codes are read
+        THEN each has the code it declared, unique across the registry
+        """
+        assert InvalidActionError.code == "api.error.003"
+        assert InvalidActionError().code == "api.error.003"
+        assert UserDoesNotExistError.code == "common.error.010"
+        assert ERROR_CODES["common.error.010"] is UserDoesNotExistError
+        assert json.loads(UserDoesNotExistError.error_body) == {
+            "errors": [UserDoesNotExistError.error_payload]
+        }
+
+    def test_invalid_codes(self):
+        """
+        GIVEN an error class without a number or reusing a code
+        WHEN it is defined
+        THEN it fails
+        """
+        with pytest.raises(TypeError, match="does not declare"):
+
+            @dataclass
+            class NoNumberError(AppBaseError):
+                pass
+
+        with pytest.raises(TypeError, match="reuses the code api.error.003"):
+
+            @dataclass
+            class DuplicateError(AppBaseError, error_number=3):
+                pass
+
+        with pytest.raises(TypeError, match="reuses the code api.error.003"):
+            # same name as the registered class, defined in another module
+            type(
+                "InvalidActionError",
+                (AppBaseError,),
+                dict(__module__="other.exceptions", __qualname__="InvalidActionError"),
+                error_number=3,
+            )
+
+        assert ERROR_CODES["api.error.003"] is InvalidActionError
+
+
+class TestErrorLogLimiter:
+    def test_log(self, caplog):
+        """
+        GIVEN identical errors raised within the interval
+        WHEN they are logged
+        THEN only the first is logged and the next one after the interval
+        carries the count of the others
+        """
+        limiter = ErrorLogLimiter(logging.getLogger("test.errors"), interval=60)
+        with caplog.at_level(logging.ERROR, logger="test.errors"):
+            with patch("api_framework.common.errors.time.monotonic", return_value=0):
+                assert limiter.log(InvalidActionError()) is True
+                assert limiter.log(InvalidActionError()) is False
+                assert limiter.log(InvalidActionError()) is False
+                assert limiter.log(InvalidActionError("other")) is True
+            with patch("api_framework.common.errors.time.monotonic", return_value=61):
+                assert limiter.log(InvalidActionError()) is True
+        messages = [record.getMessage() for record in caplog.records]
+        assert messages == [
+            "api error InvalidActionError: Invalid action provided",
+            "api error InvalidActionError: other",
+            "api error InvalidActionError: Invalid action provided"
+            " (2 more since the last one logged)",
+        ]
+
+    def test_log_no_interval(self, caplog):
+        """
+        GIVEN an interval of 0
+        WHEN identical errors are logged
+        THEN each of them is logged with its traceback
+        """
+        limiter = ErrorLogLimiter(logging.getLogger("test.errors"), interval=0)
+        with caplog.at_level(logging.ERROR, logger="test.errors"):
+            for _ in range(3):
+                try:
+                    raise ValueError("boom")
+                except ValueError as error:
+                    assert limiter.log(error) is True
+        assert len(caplog.records) == 3
+        assert all(record.exc_info for record in caplog.records)
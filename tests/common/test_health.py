@@ -0,0 +1,211 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy import Connection, create_engine
+from sqlalchemy.pool import NullPool, QueuePool, StaticPool
+
+from api_framework import app_settings
+from api_framework.common import health
+from api_framework.common.health import ReadinessProbe
+
+READY = dict(ready=True, checks=[dict(name="pool", ok=True, detail="0/15 in use")])
+
+
+def pool_engine(checked_out: int) -> SimpleNamespace:
+    """Engine with a pool of 5 connections, ``checked_out`` of them lent"""
+    pool = MagicMock(spec=QueuePool)
+    pool.size.return_value = 5
+    pool.checkedout.return_value = checked_out
+    return SimpleNamespace(pool=pool)
+
+
+def revisions(current: set[str]):
+    """Patch the revision the database is at, the scripts are at ``abc``"""
+    return (
+        patch(
+            "api_framework.migrations.alembic_runner.get_current_heads",
+            return_value=current,
+        ),
+        patch(
+            "api_framework.migrations.alembic_runner.get_script_heads",
+            return_value=frozenset({"abc"}),
+        ),
+    )
+
+
+class TestReadinessChecks:
+    async def test_check(self):
+        """
+        GIVEN a database whose schema is at head
+        WHEN the readiness is checked twice
+        THEN every check passes and the revision is only read the first time,
+        on the connection of the app engine that pinged the database
+        """
+        engine = create_engine("sqlite://")
+        probe = ReadinessProbe(ttl=0)
+        get_current_heads, get_script_heads = revisions({"abc"})
+        with (
+            patch.object(health, "get_engine", return_value=engine),
+            patch.object(app_settings, "worker_migrations", "verify"),
+            get_current_heads as current_heads,
+            get_script_heads,
+        ):
+            first = await probe.check()
+            second = await probe.check()
+        assert first == dict(
+            ready=True,
+            checks=[
+                dict(name="pool", ok=True, detail="SingletonThreadPool"),
+                dict(name="database", ok=True, detail="SELECT 1"),
+                dict(name="migrations", ok=True, detail="abc"),
+            ],
+        )
+        assert second["checks"][2] == dict(name="migrations", ok=True, detail="at head")
+        [(connection,)] = [call.args for call in current_heads.call_args_list]
+        assert isinstance(connection, Connection)
+        assert connection.engine is engine
+
+    async def test_not_at_head(self):
+        """
+        GIVEN a database whose schema is behind the scripts
+        WHEN the readiness is checked twice
+        THEN it is not ready and the revision is read again
+        """
+        engine = create_engine("sqlite://")
+        probe = ReadinessProbe(ttl=0)
+        get_current_heads, get_script_heads = revisions({"old"})
+        with (
+            patch.object(health, "get_engine", return_value=engine),
+            patch.object(app_settings, "worker_migrations", "verify"),
+            get_current_heads as current_heads,
+            get_script_heads,
+        ):
+            result = await probe.check()
+            await probe.check()
+        assert not result["ready"]
+        assert result["checks"][2] == dict(name="migrations", ok=False, detail="old")
+        assert current_heads.call_count == 2
+
+    async def test_saturated_pool(self):
+        """
+        GIVEN a pool with every connection checked out
+        WHEN the readiness is checked
+        THEN it is not ready and the database is not checked
+        """
+        check_database = AsyncMock()
+        with (
+            patch.object(health, "get_engine", return_value=pool_engine(15)),
+            patch.object(health, "check_database", check_database),
+            patch.object(app_settings, "worker_migrations", "off"),
+        ):
+            result = await ReadinessProbe(ttl=0).check()
+        assert result == dict(
+            ready=False, checks=[dict(name="pool", ok=False, detail="15/15 in use")]
+        )
+        check_database.assert_not_called()
+
+    @pytest.mark.parametrize(
+        "pool, max_overflow, expected",
+        [
+            (pool_engine(0).pool, 10, (False, "15/15 in use")),
+            (MagicMock(spec=QueuePool), -1, (True, "15 in use, no overflow limit")),
+            (NullPool(creator=MagicMock()), 10, (True, "NullPool")),
+            (StaticPool(creator=MagicMock()), 10, (True, "StaticPool")),
+        ],
+    )
+    def test_check_pool(self, pool, max_overflow, expected):
+        """
+        GIVEN 15 connections checked out of a queue pool of 5 with an overflow
+        of 10, of one without an overflow limit or of a pool that is not a
+        queue pool
+        WHEN its saturation is checked
+        THEN only the first one is saturated
+        """
+        pool.checkedout = MagicMock(return_value=15)
+        with (
+            patch.object(health, "get_engine", return_value=SimpleNamespace(pool=pool)),
+            patch.object(app_settings, "database_max_overflow", max_overflow),
+        ):
+            assert health.check_pool() == expected
+
+    async def test_database_error(self):
+        """
+        GIVEN a database that refuses connections
+        WHEN the readiness is checked
+        THEN the database check fails with the type of the error only
+        """
+
+        async def unreachable(verify_head):
+            raise ConnectionRefusedError("connection to 10.0.0.1 refused")
+
+        with (
+            patch.object(health, "get_engine", return_value=pool_engine(0)),
+            patch.object(health, "check_database", unreachable),
+        ):
+            result = await ReadinessProbe(ttl=0).check()
+        assert result["checks"][1] == dict(
+            name="database", ok=False, detail="ConnectionRefusedError"
+        )
+
+    async def test_database_timeout(self):
+        """
+        GIVEN a database check that outlasts the readiness timeout
+        WHEN the readiness is checked again before it ends, and after
+        THEN the probes fail without starting another check until it ends
+        """
+        answered = asyncio.Event()
+        calls = []
+
+        async def hung(verify_head):
+            calls.append(verify_head)
+            await answered.wait()
+            return dict(database=(True, "SELECT 1"))
+
+        probe = ReadinessProbe(ttl=0)
+        with (
+            patch.object(health, "get_engine", return_value=pool_engine(0)),
+            patch.object(health, "check_database", hung),
+            patch.object(app_settings, "worker_migrations", "off"),
+            patch.object(app_settings, "readiness_timeout", 0.01),
+        ):
+            first = await probe.check()
+            second = await probe.check()
+            assert len(calls) == 1
+            answered.set()
+            await asyncio.sleep(0)
+            third = await probe.check()
+        expected = dict(name="database", ok=False, detail="TimeoutError")
+        assert first["checks"][1] == second["checks"][1] == expected
+        assert third["ready"]
+
+
+class TestReadinessProbe:
+    async def test_cached(self):
+        """
+        GIVEN a readiness probe with a ttl
+        WHEN it is probed several times, some at once
+        THEN the readiness is only checked once
+        """
+        probe = ReadinessProbe(ttl=60)
+        with patch.object(probe, "check", AsyncMock(return_value=READY)) as check:
+            results = await asyncio.gather(*(probe.get() for _ in range(5)))
+            assert await probe.get() == READY
+        assert results == [READY] * 5
+        check.assert_awaited_once()
+
+    async def test_expired(self):
+        """
+        GIVEN a readiness probe whose result has expired
+        WHEN it is probed again
+        THEN the readiness is checked again
+        """
+        not_ready = dict(ready=False, checks=[])
+        probe = ReadinessProbe(ttl=0)
+        with patch.object(
+            probe, "check", AsyncMock(side_effect=[READY, not_ready])
+        ) as check:
+            assert await probe.get() == READY
+            assert await probe.get() == not_ready
+        assert check.await_count == 2
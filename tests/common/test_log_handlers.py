@@ -0,0 +1,112 @@
+import io
+import logging
+import threading
+from logging.config import dictConfig
+
+import pytest
+
+from api_framework.common.log_handlers import ALL_QUEUE_HANDLERS, QueueStreamHandler
+
+
+class ThreadFormatter(logging.Formatter):
+    def format(self, record):
+        return f"{threading.current_thread().name}|{super().format(record)}"
+
+
+def make_record(msg: str, *args) -> logging.LogRecord:
+    return logging.LogRecord("test", logging.INFO, __file__, 1, msg, args, None)
+
+
+class TestQueueStreamHandler:
+    def test_format_on_listener_thread(self):
+        """
+        GIVEN a queue stream handler with a formatter
+        WHEN records are emitted and the handler is closed
+        THEN they are formatted and written by the listener thread
+        """
+        stream = io.StringIO()
+        handler = QueueStreamHandler(stream=stream)
+        handler.setFormatter(ThreadFormatter("%(message)s"))
+        handler.handle(make_record("hello %s", "world"))
+        handler.close()
+        thread_name, message = stream.getvalue().strip().split("|")
+        assert thread_name != threading.current_thread().name
+        assert message == "hello world"
+
+    @pytest.mark.parametrize("policy, dropped", [("drop", 2), ("block", 0)])
+    def test_full_queue(self, policy, dropped):
+        """
+        GIVEN a queue stream handler whose queue is full
+        WHEN more records are emitted
+        THEN the drop policy discards and counts them and the block policy
+        waits until the listener makes room
+        """
+        stream = io.StringIO()
+        handler = QueueStreamHandler(stream=stream, max_size=1, policy=policy)
+        handler.listener.stop()
+        handler.handle(make_record("first"))
+        if policy == "block":
+            threading.Timer(0.05, handler.start).start()
+        handler.handle(make_record("second"))
+        handler.handle(make_record("third"))
+        stats = handler.stats()
+        assert stats["dropped"] == dropped
+        assert stats["max_size"] == 1
+        if policy == "drop":
+            assert stats["depth"] == 1
+            handler.start()
+        handler.close()
+        written = stream.getvalue().split()
+        assert written == (
+            ["first"] if policy == "drop" else ["first", "second", "third"]
+        )
+
+    def test_invalid_policy(self):
+        """
+        GIVEN an unknown queue policy
+        WHEN the handler is created
+        THEN a value error is raised
+        """
+        with pytest.raises(ValueError):
+            QueueStreamHandler(policy="wait")
+
+    def test_dict_config(self):
+        """
+        GIVEN a dictConfig handler using the queue stream handler factory
+        WHEN a logger using it logs
+        THEN the configured formatter and stream are used and the handler
+        reports its queue
+        """
+        stream = io.StringIO()
+        dictConfig(
+            dict(
+                version=1,
+                disable_existing_loggers=False,
+                formatters={"plain": {"format": "%(levelname)s %(message)s"}},
+                handlers={
+                    "queued": {
+                        "()": "api_framework.common.log_handlers.QueueStreamHandler",
+                        "stream": stream,
+                        "max_size": 5,
+                        "formatter": "plain",
+                    }
+                },
+                loggers={
+                    "test.queued": {
+                        "handlers": ["queued"],
+                        "propagate": False,
+                        "level": "INFO",
+                    }
+                },
+            )
+        )
+        logger = logging.getLogger("test.queued")
+        [handler] = logger.handlers
+        assert handler in ALL_QUEUE_HANDLERS
+        assert handler.stats() == dict(
+            name="queued", policy="drop", depth=0, max_size=5, dropped=0
+        )
+        logger.info("queued message")
+        logger.removeHandler(handler)
+        handler.close()
+        assert stream.getvalue() == "INFO queued message\n"
@@ -0,0 +1,80 @@
+import json
+import logging
+import sys
+from unittest.mock import patch
+
+import pytest
+from jsonformatter import JsonFormatter
+
+from api_framework import app_settings
+from api_framework.logger_conf import JsonLogFormatter
+
+
+def make_record(msg: str, *args, exc_info=None, **extra) -> logging.LogRecord:
+    record = logging.LogRecord(
+        "api-logger", logging.INFO, __file__, 10, msg, args, exc_info, "func"
+    )
+    record.__dict__.update(extra)
+    return record
+
+
+@pytest.fixture(scope="function")
+def formatter():
+    return JsonLogFormatter(
+        fmt=app_settings.json_log_format,
+        datefmt="%Y-%m-%d %H:%M:%S",
+        extra_fields=app_settings.json_log_extra_fields,
+    )
+
+
+class TestJsonLogFormatter:
+    def test_same_as_jsonformatter(self, formatter):
+        """
+        GIVEN the json log format of the settings
+        WHEN a record is formatted
+        THEN the output has the same fields and values as jsonformatter
+        """
+        expected = JsonFormatter(
+            app_settings.json_log_format, datefmt="%Y-%m-%d %H:%M:%S"
+        ).format(make_record("user %s created", "alice"))
+        actual = formatter.format(make_record("user %s created", "alice"))
+        assert list(json.loads(actual)) == list(json.loads(expected))
+        actual, expected = json.loads(actual), json.loads(expected)
+        assert actual.pop("Created") == pytest.approx(expected.pop("Created"), abs=1)
+        assert actual.pop("Asctime")[:10] == expected.pop("Asctime")[:10]
+        assert actual == expected
+        assert actual["Message"] == "user alice created"
+
+    def test_extra_fields(self, formatter):
+        """
+        GIVEN a record with request and tenant ids
+        WHEN it is formatted
+        THEN the ids are added under their keys, and left out when not set
+        """
+        data = json.loads(formatter.format(make_record("hi", request_id="r1")))
+        assert data["RequestId"] == "r1"
+        assert "TenantId" not in data
+
+    def test_exception(self, formatter):
+        """
+        GIVEN a record with exception info
+        WHEN it is formatted
+        THEN the traceback follows the message
+        """
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record = make_record("failed", exc_info=sys.exc_info())
+        message = json.loads(formatter.format(record))["Message"]
+        assert message.startswith("failed\nTraceback")
+        assert message.endswith("ValueError: boom")
+
+    def test_without_orjson(self, formatter):
+        """
+        GIVEN orjson is not installed
+        WHEN a record with a value JSON cannot encode is formatted
+        THEN the stdlib encoder is used and the value is written as a string
+        """
+        with patch("api_framework.common.encoders.orjson", None):
+            data = json.loads(formatter.format(make_record("hi", request_id={1, 2})))
+        assert data["RequestId"] == "{1, 2}"
@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api_framework.common.context import query_stats_var
+from api_framework.common.middleware import RequestContextMiddleware
+
+prometheus_client = pytest.importorskip("prometheus_client")
+
+from api_framework.common.metrics import (  # noqa: E402
+    UNMATCHED_ROUTE,
+    MetricsMiddleware,
+    RequestMetrics,
+)
+
+
+@pytest.fixture(scope="function")
+def registry():
+    return prometheus_client.CollectorRegistry()
+
+
+@pytest.fixture(scope="function")
+def metrics_client(registry):
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, metrics=RequestMetrics(registry=registry))
+    app.add_middleware(RequestContextMiddleware)
+
+    @app.get("/user/{username}")
+    async def get_user(username: str):
+        stats = query_stats_var.get()
+        stats.count += 3
+        stats.duration += 0.002
+        return dict(username=username)
+
+    @app.get("/error")
+    async def error():
+        raise ValueError("error")
+
+    return TestClient(app, raise_server_exceptions=False)
+
+
+class TestMetricsMiddleware:
+    def test_request_metrics(self, metrics_client, registry):
+        """
+        GIVEN an app with the metrics middleware
+        WHEN requests are served
+        THEN their latency, status and statements are recorded by route template
+        """
+        for username in ("alice", "bob"):
+            assert metrics_client.get(f"/user/{username}").status_code == 200
+        assert metrics_client.get("/missing").status_code == 404
+        assert metrics_client.get("/error").status_code == 500
+
+        def sample(name, **labels):
+            return registry.get_sample_value(name, labels)
+
+        route = "/user/{username}"
+        assert (
+            sample(
+                "http_request_duration_seconds_count",
+                method="GET",
+                route=route,
+                status="200",
+            )
+            == 2
+        )
+        assert (
+            sample(
+                "http_request_duration_seconds_count",
+                method="GET",
+                route=UNMATCHED_ROUTE,
+                status="404",
+            )
+            == 1
+        )
+        assert (
+            sample(
+                "http_request_duration_seconds_count",
+                method="GET",
+                route="/error",
+                status="500",
+            )
+            == 1
+        )
+        assert sample("http_request_db_queries_total", route=route) == 6
+        assert sample("http_request_db_seconds_total", route=route) == (
+            pytest.approx(0.004)
+        )
+        # requests without statements do not touch the database counters
+        assert sample("http_request_db_queries_total", route="/error") == 0
+        assert sample("http_requests_in_flight") == 0
+
+    async def test_in_flight(self, registry):
+        """
+        GIVEN requests that are still being served
+        WHEN the requests in flight are read
+        THEN the gauge counts all of them, and none once they ended
+        """
+        answered = asyncio.Event()
+
+        async def app(scope, receive, send):
+            await answered.wait()
+            await send(dict(type="http.response.start", status=200, headers=[]))
+            await send(dict(type="http.response.body", body=b""))
+
+        async def receive():
+            return dict(type="http.request", body=b"", more_body=False)
+
+        async def send(message):
+            pass
+
+        middleware = MetricsMiddleware(app, metrics=RequestMetrics(registry=registry))
+        scope = dict(type="http", method="GET", path="/slow")
+        requests = [
+            asyncio.create_task(middleware(dict(scope), receive, send))
+            for _ in range(5)
+        ]
+        await asyncio.sleep(0)
+        assert registry.get_sample_value("http_requests_in_flight") == 5
+        answered.set()
+        await asyncio.gather(*requests)
+        assert registry.get_sample_value("http_requests_in_flight") == 0
@@ -0,0 +1,220 @@
+import logging
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from api_framework import app_settings
+from api_framework.common.context import (
+    install_log_record_factory,
+    query_stats_var,
+    request_id_var,
+    tenant_id_var,
+)
+from api_framework.common.middleware import (
+    AccessLogMiddleware,
+    RequestContextMiddleware,
+    format_body,
+    logger,
+)
+
+
+@pytest.fixture(scope="module")
+def log_client():
+    app = FastAPI()
+    app.add_middleware(AccessLogMiddleware)
+    app.add_middleware(RequestContextMiddleware)
+
+    @app.post("/echo/{name}")
+    async def echo(name: str, data: dict):
+        return data
+
+    @app.get("/context")
+    async def context():
+        return dict(request_id=request_id_var.get(), tenant_id=tenant_id_var.get())
+
+    @app.get("/queries/{count}")
+    async def queries(count: int):
+        # stands for the statements the engine events count
+        stats = query_stats_var.get()
+        stats.count += count
+        stats.duration += count * 0.001
+        return dict(route=stats.route)
+
+    @app.get("/stream")
+    async def stream():
+        return StreamingResponse(iter([b"ab", b"cd", b"ef"]), media_type="text/plain")
+
+    return TestClient(app)
+
+
+@pytest.fixture(scope="function")
+def caplog(caplog):
+    # the app loggers do not propagate to the root logger caplog listens on
+    logger.addHandler(caplog.handler)
+    with patch.object(logger, "propagate", False):
+        yield caplog
+    logger.removeHandler(caplog.handler)
+
+
+def log_messages(caplog) -> list[str]:
+    return [
+        record.getMessage() for record in caplog.records if record.name == logger.name
+    ]
+
+
+class TestAccessLogMiddleware:
+    def test_format_body(self):
+        """
+        GIVEN the start of a request or response body
+        WHEN it is formatted for the log
+        THEN a cut body notes the full length
+        """
+        assert format_body(b'{"a": 1}', 8) == '{"a": 1}'
+        assert format_body(b"xxxx", 10) == "xxxx... (10 bytes)"
+
+    def test_access_log(self, log_client, caplog):
+        """
+        GIVEN the access log middleware
+        WHEN a route is called
+        THEN method, path, status, bytes in/out, latency and parameters are logged
+        without the bodies
+        """
+        with caplog.at_level(logging.INFO, logger=logger.name):
+            actual_response = log_client.post(
+                "/echo/alice",
+                params={"q": "1"},
+                headers={"x-tenant-id": "t1"},
+                json={"name": "value"},
+            )
+        assert actual_response.status_code == 200
+        [message] = log_messages(caplog)
+        assert message.startswith("POST /echo/alice http 200 in=16B out=16B ")
+        assert "x-tenant-id" not in message
+        assert "Path Params={'name': 'alice'}" in message
+        assert message.endswith("Query Params=q=1")
+
+    def test_access_log_queries(self, log_client, caplog):
+        """
+        GIVEN the access log and request context middlewares
+        WHEN a route running database statements is called
+        THEN their number and time are logged
+        """
+        with caplog.at_level(logging.INFO, logger=logger.name):
+            log_client.get("/queries/3")
+        [message] = log_messages(caplog)
+        assert " queries=3 db=3.00ms " in message
+
+    def test_access_log_streaming(self, log_client, caplog):
+        """
+        GIVEN the access log middleware
+        WHEN a streaming route is called
+        THEN all chunks reach the client and their total size is logged
+        """
+        with caplog.at_level(logging.INFO, logger=logger.name):
+            actual_response = log_client.get("/stream")
+        assert actual_response.content == b"abcdef"
+        assert log_messages(caplog)[0].startswith("GET /stream http 200 in=0B out=6B ")
+
+    def test_log_bodies(self, log_client, caplog):
+        """
+        GIVEN body logging is on
+        WHEN a route is called
+        THEN the start of the raw request and response bodies are logged
+        """
+        with (
+            patch.object(app_settings, "log_bodies", True),
+            patch.object(app_settings, "log_body_max_size", 8),
+            caplog.at_level(logging.INFO, logger=logger.name),
+        ):
+            log_client.post("/echo/alice", json={"name": "value"})
+        assert log_messages(caplog)[1:] == [
+            'Request Body={"name":... (16 bytes)',
+            'Response Body={"name":... (16 bytes)',
+        ]
+
+    @pytest.mark.parametrize(
+        "log_bodies, sample_rate",
+        [(False, 1.0), (True, 0.0)],
+    )
+    def test_skip_bodies(self, log_client, caplog, log_bodies, sample_rate):
+        """
+        GIVEN body logging is off or the request is not sampled
+        WHEN a route is called
+        THEN only the access line is logged
+        """
+        with (
+            patch.object(app_settings, "log_bodies", log_bodies),
+            patch.object(app_settings, "log_body_sample_rate", sample_rate),
+            caplog.at_level(logging.INFO, logger=logger.name),
+        ):
+            log_client.post("/echo/alice", json={"name": "value"})
+        assert len(log_messages(caplog)) == 1
+
+    def test_logger_disabled(self, log_client, caplog):
+        """
+        GIVEN the logger is not enabled for INFO
+        WHEN a route is called
+        THEN nothing is logged
+        """
+        with caplog.at_level(logging.WARNING, logger=logger.name):
+            actual_response = log_client.post("/echo/alice", json={"name": "value"})
+        assert actual_response.status_code == 200
+        assert log_messages(caplog) == []
+
+
+class TestRequestContextMiddleware:
+    def test_generated_request_id(self, log_client, caplog):
+        """
+        GIVEN the request context middleware
+        WHEN a request without a request id is made
+        THEN a request id is generated, set in the context with the tenant id,
+        returned in the X-Request-ID header and stamped on the log records
+        """
+        install_log_record_factory()
+        with caplog.at_level(logging.INFO, logger=logger.name):
+            actual_response = log_client.get("/context", headers={"x-tenant-id": "t1"})
+        request_id = actual_response.headers["x-request-id"]
+        assert len(request_id) == 32
+        assert actual_response.json() == dict(request_id=request_id, tenant_id="t1")
+        [record] = [r for r in caplog.records if r.name == logger.name]
+        assert (record.request_id, record.tenant_id) == (request_id, "t1")
+
+    def test_incoming_request_id(self, log_client):
+        """
+        GIVEN the request context middleware
+        WHEN a request with an X-Request-ID header is made
+        THEN the same request id is used, and one that is too long is replaced
+        """
+        actual_response = log_client.get("/context", headers={"x-request-id": "abc"})
+        assert actual_response.headers["x-request-id"] == "abc"
+        assert actual_response.json()["request_id"] == "abc"
+        actual_response = log_client.get(
+            "/context", headers={"x-request-id": "a" * 200}
+        )
+        assert len(actual_response.headers["x-request-id"]) == 32
+
+    def test_server_timing(self, log_client):
+        """
+        GIVEN the request context middleware
+        WHEN a route running database statements is called
+        THEN the statements and their time are returned in the Server-Timing
+        header, with the route the query stats are bound to
+        """
+        actual_response = log_client.get("/queries/2")
+        db, app = actual_response.headers["server-timing"].split(", ")
+        assert db == 'db;dur=2.00;desc="2 queries"'
+        assert app.startswith("app;dur=")
+        assert actual_response.json() == dict(route="GET /queries/{count}")
+
+    def test_server_timing_disabled(self, log_client):
+        """
+        GIVEN SERVER_TIMING is off
+        WHEN a route is called
+        THEN no Server-Timing header is returned
+        """
+        with patch.object(app_settings, "server_timing", False):
+            actual_response = log_client.get("/queries/2")
+        assert "server-timing" not in actual_response.headers
@@ -0,0 +1,27 @@
+import pytest
+
+from api_framework.common.pagination import decode_cursor, encode_cursor
+from api_framework.exceptions import InvalidValueError
+
+
+class TestPagination:
+    def test_cursor_round_trip(self):
+        """
+        GIVEN a pagination key
+        WHEN it is encoded and decoded again
+        THEN the original key is returned from an opaque, url safe cursor
+        """
+        for key in ("alice", "user_ü/+?", "a" * 100):
+            cursor = encode_cursor(key)
+            assert key not in cursor
+            assert "=" not in cursor
+            assert decode_cursor(cursor) == key
+
+    def test_decode_invalid_cursor(self):
+        """
+        GIVEN a cursor that was not produced by encode_cursor
+        WHEN it is decoded
+        THEN an invalid value error is raised
+        """
+        with pytest.raises(InvalidValueError):
+            decode_cursor("!!!")
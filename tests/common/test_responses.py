@@ -0,0 +1,58 @@
+from unittest.mock import patch
+
+import pytest
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from api_framework import app_settings
+from api_framework.common.responses import ModelResponse, get_default_response_class
+from api_framework.user.schemas import UserPageSchema
+
+
+class TestResponses:
+    def test_model_response(self):
+        """
+        GIVEN a validated response model
+        WHEN it is returned in a model response
+        THEN it is serialized straight to compact JSON with its aliases
+        """
+        page = UserPageSchema(
+            items=[dict(username="alice", last_name="Tester", addresses=[])]
+        )
+        response = ModelResponse(page, status_code=201)
+        assert response.status_code == 201
+        assert response.headers["content-type"] == "application/json"
+        assert response.body == page.model_dump_json(by_alias=True).encode()
+        assert b'"lastName":"Tester"' in response.body
+
+    @pytest.mark.parametrize("with_orjson", [True, False])
+    def test_model_response_dict(self, with_orjson):
+        """
+        GIVEN content that is already serialized
+        WHEN it is returned in a model response
+        THEN it is encoded as it is, with or without orjson
+        """
+        content = {"errors": [{"code": "api.error.999", "message": "ü"}]}
+        orjson = pytest.importorskip("orjson") if with_orjson else None
+        with patch("api_framework.common.encoders.orjson", orjson):
+            response = ModelResponse(content)
+        assert (
+            response.body
+            == '{"errors":[{"code":"api.error.999","message":"ü"}]}'.encode()
+        )
+
+    def test_default_response_class(self):
+        """
+        GIVEN the default_response_class setting
+        WHEN the default response class is looked up
+        THEN the configured class is returned, json when orjson is not installed,
+        and an unknown name raises an error
+        """
+        with patch.object(app_settings, "default_response_class", "json"):
+            assert get_default_response_class() is JSONResponse
+        with patch.object(app_settings, "default_response_class", "orjson"):
+            assert get_default_response_class() is ORJSONResponse
+            with patch("api_framework.common.responses.orjson", None):
+                assert get_default_response_class() is JSONResponse
+        with patch.object(app_settings, "default_response_class", "xml"):
+            with pytest.raises(ValueError):
+                get_default_response_class()
@@ -0,0 +1,66 @@
+from api_framework.common.schemas import AppBaseSchema, nested_schema
+from api_framework.user.models import User, UserAddress
+from api_framework.user.schemas import UserAddressSchema, UserPageSchema, UserSchema
+
+
+class TestAppBaseSchema:
+    def test_dump_attributes(self):
+        """
+        GIVEN a user read from the database with its addresses
+        WHEN it is dumped from its attributes
+        THEN the result matches the validated schema dumped with its aliases
+        """
+        user = User(
+            username="alice",
+            first_name="Alice",
+            last_name="Tester",
+            email="alice@example.com",
+            status="active",
+            addresses=[
+                UserAddress(
+                    type=1,
+                    address_line_1="1 Main Street",
+                    address_line_2="Suite 100",
+                    city="Springfield",
+                    state="IL",
+                    postal_code="62701",
+                )
+            ],
+        )
+        expected = UserSchema.model_validate(user).model_dump(
+            mode="json", by_alias=True
+        )
+        assert UserSchema.dump_attributes(user) == expected
+        assert list(UserSchema.dump_attributes(user)) == list(expected)
+        assert UserSchema.dump_attributes(user)["addresses"][0]["addressLine1"] == (
+            "1 Main Street"
+        )
+
+    def test_dump_attributes_nested(self):
+        """
+        GIVEN schemas with optional, listed and plain fields
+        WHEN the nested schema of each field is looked up
+        THEN only the fields holding a schema are dumped as nested schemas
+        """
+
+        class Holder(AppBaseSchema):
+            user: UserSchema | None = None
+            name: str
+
+        class Obj:
+            user = None
+            name = "holder"
+
+        assert nested_schema(UserSchema.model_fields["addresses"].annotation) == (
+            UserAddressSchema,
+            True,
+        )
+        assert nested_schema(Holder.model_fields["user"].annotation) == (
+            UserSchema,
+            False,
+        )
+        assert nested_schema(UserPageSchema.model_fields["next"].annotation) == (
+            None,
+            False,
+        )
+        assert Holder.dump_attributes(Obj()) == dict(user=None, name="holder")
@@ -0,0 +1,87 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from api_framework import app_settings
+from api_framework.app import app, lifespan
+from api_framework.migrations import alembic_runner
+from api_framework.migrations.alembic_runner import MIGRATION_LOCK_ID
+
+
+class TestAlembicRunner:
+    @pytest.mark.parametrize(
+        "dialect, locked", [("postgresql", True), ("sqlite", False)]
+    )
+    def test_upgrade_lock(self, dialect, locked):
+        """
+        GIVEN a database connection
+        WHEN the migrations are run
+        THEN they run on that connection inside the transaction holding the
+        advisory lock on postgres
+        """
+        connection = MagicMock()
+        connection.dialect.name = dialect
+        connection.__enter__.return_value = connection
+
+        def upgrade(config, revision):
+            assert config.attributes["connection"] is connection
+            assert revision == "head"
+
+        with (
+            patch.object(alembic_runner, "connect", return_value=connection),
+            patch.object(alembic_runner.command, "upgrade", side_effect=upgrade),
+        ):
+            assert alembic_runner.upgrade() is True
+        connection.begin.assert_called_once()
+        assert connection.execute.called is locked
+        if locked:
+            params = connection.execute.call_args.args[1]
+            assert params == dict(key=MIGRATION_LOCK_ID)
+        assert "connection" not in alembic_runner.get_alembic_config().attributes
+
+    @pytest.mark.parametrize(
+        "current, heads, expected",
+        [({"b"}, {"b"}, True), ({"a"}, {"b"}, False), (set(), {"b"}, False)],
+    )
+    def test_is_at_head(self, current, heads, expected):
+        """
+        GIVEN the revisions of the database and of the scripts
+        WHEN the schema is checked
+        THEN it is at head only when they match
+        """
+        with patch.object(
+            alembic_runner, "get_revisions", return_value=(current, heads)
+        ):
+            assert alembic_runner.is_at_head() is expected
+
+
+class TestLifespan:
+    @pytest.mark.parametrize(
+        "mode, at_head, upgraded, error",
+        [
+            ("verify", True, False, None),
+            ("verify", False, False, RuntimeError),
+            ("upgrade", False, True, None),
+            ("off", False, False, None),
+            ("sometimes", True, False, ValueError),
+        ],
+    )
+    async def test_worker_migrations(self, mode, at_head, upgraded, error):
+        """
+        GIVEN a worker_migrations mode
+        WHEN a worker starts
+        THEN it only checks the schema is at head, upgrades it or does nothing
+        """
+        with (
+            patch.object(app_settings, "worker_migrations", mode),
+            patch.object(alembic_runner, "is_at_head", return_value=at_head),
+            patch.object(alembic_runner, "upgrade") as upgrade,
+        ):
+            if error:
+                with pytest.raises(error):
+                    async with lifespan(app):
+                        pass
+            else:
+                async with lifespan(app):
+                    pass
+        assert upgrade.called is upgraded
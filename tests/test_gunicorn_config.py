@@ -0,0 +1,93 @@
+from unittest.mock import patch
+
+import pytest
+
+from api_framework import gunicorn_config
+from api_framework.gunicorn_config import available_cpus, read_cgroup_cpus
+
+
+class TestGunicornConfig:
+    @pytest.mark.parametrize(
+        "files, expected",
+        [
+            ({"cpu.max": "250000 100000\n"}, 2.5),
+            ({"cpu.max": "max 100000\n"}, None),
+            (
+                {
+                    "cpu/cpu.cfs_quota_us": "50000\n",
+                    "cpu/cpu.cfs_period_us": "100000\n",
+                },
+                0.5,
+            ),
+            (
+                {
+                    "cpu/cpu.cfs_quota_us": "-1\n",
+                    "cpu/cpu.cfs_period_us": "100000\n",
+                },
+                None,
+            ),
+            ({}, None),
+        ],
+    )
+    def test_read_cgroup_cpus(self, tmp_path, files, expected):
+        """
+        GIVEN the cpu quota files of cgroup v2 or v1, or none of them
+        WHEN the cpu limit is read
+        THEN the quota is divided by the period, None without a limit
+        """
+        for name, content in files.items():
+            path = tmp_path / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(content)
+        assert read_cgroup_cpus(str(tmp_path)) == expected
+
+    @pytest.mark.parametrize("limit, expected", [(None, 8), (2.5, 3), (0.5, 1)])
+    def test_available_cpus(self, limit, expected):
+        """
+        GIVEN 8 CPUs and a cgroup limit
+        WHEN the available CPUs are counted
+        THEN the limit rounded up bounds them, with at least one
+        """
+        with (
+            patch.object(
+                gunicorn_config.os,
+                "sched_getaffinity",
+                return_value=set(range(8)),
+                create=True,
+            ),
+            patch.object(gunicorn_config, "read_cgroup_cpus", return_value=limit),
+        ):
+            assert available_cpus() == expected
+
+    @pytest.mark.parametrize("upgraded", [True, False])
+    def test_on_starting(self, upgraded):
+        """
+        GIVEN the migrations run when gunicorn starts
+        WHEN they succeed or fail
+        THEN gunicorn goes on forking the workers or stops with an error
+        """
+        with (
+            patch.object(gunicorn_config.app_settings, "migrate_on_starting", True),
+            patch(
+                "api_framework.migrations.alembic_runner.upgrade",
+                return_value=upgraded,
+            ) as upgrade,
+        ):
+            if upgraded:
+                gunicorn_config.on_starting(server=None)
+            else:
+                with pytest.raises(RuntimeError, match="migrations failed"):
+                    gunicorn_config.on_starting(server=None)
+        upgrade.assert_called_once_with()
+
+    def test_clear_metrics_dir(self, tmp_path, monkeypatch):
+        """
+        GIVEN metric files left by the workers of a previous run
+        WHEN gunicorn starts
+        THEN they are removed from the multiprocess directory
+        """
+        (tmp_path / "histogram_123.db").write_bytes(b"")
+        (tmp_path / "keep.txt").write_text("")
+        monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+        gunicorn_config.clear_metrics_dir()
+        assert [path.name for path in tmp_path.iterdir()] == ["keep.txt"]
@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+
+# seconds a cold import of the app may take, raise it with IMPORT_TIME_BUDGET on
+# slow machines rather than loosening what is imported
+IMPORT_TIME_BUDGET = float(os.environ.get("IMPORT_TIME_BUDGET", "2.0"))
+
+# only needed once a worker starts or connects to the database
+LAZY_MODULES = ("alembic", "asyncpg", "psycopg2")
+
+
+def import_app() -> tuple[dict[str, int], set[str]]:
+    """Cumulative import time of each module in microseconds (``python -X
+    importtime``) and the modules loaded by a cold import of the app
+    """
+    code = "import sys, api_framework.app; print(' '.join(sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=dict(os.environ, API_LOG_TYPE="default", LOG_LEVEL="WARNING"),
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, module = line.split("|")
+            if cumulative.strip().isdigit():
+                times[module.strip()] = int(cumulative)
+    return times, set(result.stdout.splitlines()[-1].split())
+
+
+class TestImportTime:
+    def test_import_time(self):
+        """
+        GIVEN a new interpreter
+        WHEN api_framework.app is imported
+        THEN it takes less than the budget, without alembic or a database driver
+        """
+        runs = [import_app() for _ in range(3)]
+        times, modules = min(runs, key=lambda run: run[0]["api_framework.app"])
+        slowest = sorted(times.items(), key=lambda item: item[1], reverse=True)[:15]
+        report = "\n".join(f"{us / 1e6:8.3f}s  {module}" for module, us in slowest)
+        assert times["api_framework.app"] / 1e6 < IMPORT_TIME_BUDGET, report
+        assert not [
+            module for module in modules if module.split(".")[0] in LAZY_MODULES
+        ], report
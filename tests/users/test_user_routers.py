@@ -0,0 +1,193 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from api_framework import app_settings
+from api_framework.common.pagination import encode_cursor
+from api_framework.user.models import User
+from api_framework.user.schemas import BulkItemStatus
+
+
+class TestUserRouters:
+    @patch("api_framework.user.services.UserService.create_users")
+    def test_create_users(self, mock_create_users, client, headers):
+        """
+        GIVEN client is up and running
+        WHEN bulk create users endpoint is called
+        THEN it returns the per-item results with created and failed counts
+        """
+        mock_create_users.return_value = [
+            dict(index=0, username="one", status=BulkItemStatus.CREATED),
+            dict(
+                index=1,
+                username="two",
+                status=BulkItemStatus.FAILED,
+                message="User with name two already exists",
+            ),
+        ]
+        payload = [
+            dict(username=username, lastName="Tester", addresses=[])
+            for username in ("one", "two")
+        ]
+        actual_response = client.post(
+            f"{app_settings.base_url_prefix}/user/bulk", headers=headers, json=payload
+        )
+        assert actual_response.status_code == 200
+        assert actual_response.json() == {
+            "created": 1,
+            "failed": 1,
+            "results": [
+                {"index": 0, "username": "one", "status": "created", "message": None},
+                {
+                    "index": 1,
+                    "username": "two",
+                    "status": "failed",
+                    "message": "User with name two already exists",
+                },
+            ],
+        }
+        assert len(mock_create_users.call_args.kwargs["users_data"]) == 2
+
+    @patch("api_framework.user.services.UserService.update_user")
+    def test_update_user_addresses(self, mock_update_user, client, headers):
+        """
+        GIVEN client is up and running
+        WHEN update user endpoint is called with addresses that set different
+        fields, one of them without a type
+        THEN only the user fields sent are updated and every address is passed
+        with all of its fields and defaults
+        """
+        mock_update_user.return_value = User(
+            username="one", last_name="Tester", status="active", addresses=[]
+        )
+        payload = dict(
+            username="one",
+            lastName="Tester",
+            addresses=[
+                dict(
+                    addressLine1="9 Elm Street",
+                    city="Chicago",
+                    state="IL",
+                    postalCode="60601",
+                ),
+                dict(
+                    type=2,
+                    addressLine1="1 Office Park",
+                    addressLine2="Suite 5",
+                    city="Springfield",
+                    state="IL",
+                    postalCode="62701",
+                ),
+            ],
+        )
+        actual_response = client.put(
+            f"{app_settings.base_url_prefix}/user/update", headers=headers, json=payload
+        )
+        assert actual_response.status_code == 200
+        user_data = mock_update_user.call_args.kwargs["user_data"]
+        assert user_data.keys() == {"username", "last_name", "addresses"}
+        home, work = user_data["addresses"]
+        assert home.keys() == work.keys()
+        assert (home["type"], home["address_line_2"]) == (1, None)
+        assert (work["type"], work["address_line_2"]) == (2, "Suite 5")
+
+    @patch("api_framework.user.services.UserService.get_user")
+    def test_get_user_all_pages(self, mock_get_user, client, headers):
+        """
+        GIVEN client is up and running
+        WHEN get all users endpoint is called with a limit and cursor
+        THEN it returns one page of users and the cursor of the next page
+        """
+        mock_get_user.return_value = [
+            User(username=f"user{i}", last_name="Tester", status="active", addresses=[])
+            for i in range(3)
+        ]
+        actual_response = client.get(
+            f"{app_settings.base_url_prefix}/user/",
+            headers=headers,
+            params={"limit": 2, "cursor": encode_cursor("user")},
+        )
+        assert actual_response.status_code == 200
+        data = actual_response.json()
+        assert [user["username"] for user in data["items"]] == ["user0", "user1"]
+        assert data["next"] == encode_cursor("user1")
+        assert mock_get_user.call_args.kwargs["after"] == "user"
+        assert mock_get_user.call_args.kwargs["limit"] == 3
+
+        mock_get_user.return_value = mock_get_user.return_value[:1]
+        actual_response = client.get(
+            f"{app_settings.base_url_prefix}/user/",
+            headers=headers,
+            params={"limit": 2, "cursor": data["next"]},
+        )
+        assert actual_response.json()["next"] is None
+
+    @patch("api_framework.user.services.UserService.get_user_detail")
+    @patch("api_framework.user.services.UserService.get_user_modify_date")
+    def test_get_user_not_modified(
+        self, mock_get_modify_date, mock_get_user_detail, client, headers
+    ):
+        """
+        GIVEN client is up and running
+        WHEN get user endpoint is called again with the returned validators
+        THEN it answers 304 from the modify date without loading the user
+        """
+        modify_date = datetime(2025, 1, 1, 12, 0, 0)
+        mock_get_modify_date.return_value = modify_date
+        mock_get_user_detail.return_value = (
+            dict(username="alice", lastName="Tester", addresses=[]),
+            modify_date,
+        )
+        url = f"{app_settings.base_url_prefix}/user/alice"
+        actual_response = client.get(url, headers=headers)
+        assert actual_response.status_code == 200
+        etag = actual_response.headers["etag"]
+        last_modified = actual_response.headers["last-modified"]
+        mock_get_modify_date.assert_not_called()
+
+        mock_get_user_detail.reset_mock()
+        for validator in (
+            {"If-None-Match": etag},
+            {"If-Modified-Since": last_modified},
+        ):
+            actual_response = client.get(url, headers=headers | validator)
+            assert actual_response.status_code == 304
+            assert actual_response.headers["etag"] == etag
+            assert actual_response.content == b""
+        mock_get_user_detail.assert_not_called()
+
+        mock_get_modify_date.return_value = modify_date + timedelta(seconds=1)
+        actual_response = client.get(url, headers=headers | {"If-None-Match": etag})
+        assert actual_response.status_code == 200
+        assert actual_response.json()["username"] == "alice"
+
+    @patch("api_framework.user.services.UserService.get_user")
+    @patch("api_framework.user.services.UserService.get_user_versions")
+    def test_get_user_all_not_modified(
+        self, mock_get_versions, mock_get_user, client, headers
+    ):
+        """
+        GIVEN client is up and running
+        WHEN get all users endpoint is called again with the returned etag
+        THEN it answers 304 from the usernames and modify dates of the page
+        """
+        users = [
+            User(username=f"user{i}", last_name="Tester", status="active", addresses=[])
+            for i in range(2)
+        ]
+        mock_get_user.return_value = users
+        mock_get_versions.return_value = [
+            (user.username, user.modify_date) for user in users
+        ]
+        url = f"{app_settings.base_url_prefix}/user/"
+        actual_response = client.get(url, headers=headers)
+        assert actual_response.status_code == 200
+        etag = actual_response.headers["etag"]
+
+        mock_get_user.reset_mock()
+        actual_response = client.get(url, headers=headers | {"If-None-Match": etag})
+        assert actual_response.status_code == 304
+        mock_get_user.assert_not_called()
+
+        mock_get_versions.return_value = mock_get_versions.return_value[:1]
+        actual_response = client.get(url, headers=headers | {"If-None-Match": etag})
+        assert actual_response.status_code == 200
@@ -0,0 +1,313 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.dialects import postgresql
+
+from api_framework.common.cache import LRUCache
+from api_framework.user.exceptions import UserAlreadyExistError
+from api_framework.user.models import SearchMode
+from api_framework.user.schemas import BulkItemStatus, UserSchema
+from api_framework.user.services import UserService
+
+
+def user_data(username: str, address_types=(1, 2)) -> dict:
+    return UserSchema(
+        username=username,
+        last_name="Tester",
+        addresses=[
+            dict(
+                type=address_type,
+                address_line_1=f"{address_type} Main Street",
+                city="Springfield",
+                state="IL",
+                postal_code="62701",
+            )
+            for address_type in address_types
+        ],
+    ).model_dump()
+
+
+@pytest.fixture(scope="function", params=["database_session", "async_database_session"])
+def session(request):
+    """Sync psycopg2 session and asyncpg AsyncSession, each on its own database"""
+    return request.getfixturevalue(request.param)
+
+
+@contextmanager
+def count_statements(session):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    # the AsyncSession runs its statements through the engine of a sync session
+    engine = getattr(session, "sync_session", session).get_bind()
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+class TestUserService:
+    async def test_create_users(self, session):
+        """
+        GIVEN database is up and running
+        WHEN create users method is called with a batch of users
+        THEN new users are created with their addresses and existing, repeated
+        or invalid rows are reported per row without failing the batch
+        """
+        service = UserService(session=session)
+        await service.create_user(user_data("bulk_existing"))
+        long_postal_code = user_data("bulk_postal_code")
+        long_postal_code["addresses"][0]["postal_code"] = "1" * 11
+
+        results = await service.create_users(
+            [
+                user_data("bulk_one"),
+                user_data("bulk_existing"),
+                user_data("bulk_two", address_types=()),
+                user_data("bulk_one"),
+                user_data("bulk_address_types", address_types=(1, 1)),
+                long_postal_code,
+                user_data("b" * 101, address_types=()),
+            ]
+        )
+
+        assert [result["status"] for result in results] == [
+            BulkItemStatus.CREATED,
+            BulkItemStatus.FAILED,
+            BulkItemStatus.CREATED,
+            BulkItemStatus.FAILED,
+            BulkItemStatus.FAILED,
+            BulkItemStatus.FAILED,
+            BulkItemStatus.FAILED,
+        ]
+        assert [result["index"] for result in results] == list(range(7))
+        assert "already exists" in results[1]["message"]
+        assert "repeated" in results[3]["message"]
+        assert "user_address_user_id_type_key" in results[4]["message"]
+        assert "too long" in results[5]["message"]
+        assert "too long" in results[6]["message"]
+
+        user = await service.get_user(username="bulk_one")
+        assert sorted(address.type for address in user.addresses) == [1, 2]
+        user = await service.get_user(username="bulk_two")
+        assert user.addresses == []
+        for result in results[4:]:
+            assert await service.get_user(username=result["username"]) is None
+
+    async def test_get_user_pages(self, session):
+        """
+        GIVEN database is up and running
+        WHEN get user method is called with a limit and the last username seen
+        THEN it returns the next users in username order
+        """
+        service = UserService(session=session)
+        await service.create_users(
+            [user_data(f"page_{i}", address_types=()) for i in range(5)]
+        )
+
+        first = await service.get_user(search="page_", limit=2)
+        assert [user.username for user in first] == ["page_0", "page_1"]
+        second = await service.get_user(search="page_", after="page_1", limit=2)
+        assert [user.username for user in second] == ["page_2", "page_3"]
+        last = await service.get_user(search="page_", after="page_3", limit=2)
+        assert [user.username for user in last] == ["page_4"]
+
+    async def test_get_user_statement_count(self, session):
+        """
+        GIVEN database is up and running
+        WHEN users are listed and serialized with their addresses
+        THEN the number of statements stays the same as the number of users grows
+        """
+        service = UserService(session=session)
+        counts = []
+        for batch in range(2):
+            await service.create_users(
+                [user_data(f"count_{batch}_{i}") for i in range(2 + batch * 10)]
+            )
+            session.expire_all()
+            with count_statements(session) as statements:
+                users = await service.get_user(search="count_")
+                serialized = [UserSchema.model_validate(user) for user in users]
+            assert all(len(user.addresses) == 2 for user in serialized)
+            counts.append(len(statements))
+
+        assert len(users) == 14
+        assert counts == [2, 2]
+
+    @pytest.mark.parametrize(
+        "search_mode, index_name",
+        [
+            (SearchMode.PREFIX, "ix_user_username_lower_pattern"),
+            (SearchMode.CONTAINS, "ix_user_username_trgm"),
+        ],
+    )
+    async def test_search_uses_index(self, session, search_mode, index_name):
+        """
+        GIVEN database is up and running
+        WHEN users are searched by prefix or by contained text
+        THEN the query plan scans the matching username index
+        """
+        service = UserService(session=session)
+        await service.create_users(
+            [user_data(f"{search_mode}_{i}", address_types=()) for i in range(3)]
+        )
+        statement = service.get_user_statement(
+            search=search_mode.upper(), search_mode=search_mode, load_addresses=False
+        )
+        compiled = statement.compile(
+            dialect=postgresql.dialect(), compile_kwargs=dict(literal_binds=True)
+        )
+        # the test table is tiny, so a sequential scan would always be cheaper
+        await service.execute(text("SET LOCAL enable_seqscan = off"))
+        plan = (await service.execute(text(f"EXPLAIN {compiled}"))).scalars()
+        assert index_name in "\n".join(plan)
+
+        users = await service.get_user(
+            search=f"{search_mode.upper()}_", search_mode=search_mode
+        )
+        assert [user.username for user in users] == [
+            f"{search_mode}_{i}" for i in range(3)
+        ]
+
+    async def test_update_user_addresses(self, session):
+        """
+        GIVEN database is up and running
+        WHEN update user method is called with a new set of addresses
+        THEN addresses of the same type are updated, new types are added, missing
+        types are removed and addresses of other users are untouched, with the
+        same number of statements however many addresses are sent
+        """
+        service = UserService(session=session)
+        await service.create_users(
+            [user_data("update_one", (1, 2)), user_data("update_other", (1, 2))]
+        )
+
+        counts = []
+        for address_types in ((2, 3), (1, 2, 3)):
+            data = user_data("update_one", address_types)
+            data["addresses"][0]["city"] = "Chicago"
+            with count_statements(session) as statements:
+                user = await service.update_user(data)
+            counts.append(len(statements))
+            cities = {address.type: address.city for address in user.addresses}
+            assert sorted(cities) == list(address_types)
+            assert cities[address_types[0]] == "Chicago"
+
+        assert counts[0] == counts[1]
+        session.expire_all()
+        other = await service.get_user(username="update_other")
+        assert sorted((address.type, address.city) for address in other.addresses) == [
+            (1, "Springfield"),
+            (2, "Springfield"),
+        ]
+
+    async def test_update_user_address_defaults(self, session):
+        """
+        GIVEN database is up and running
+        WHEN update user method is called with an address without a type and
+        addresses that set different fields
+        THEN the address without a type replaces the home address, every field
+        sent is written and the addresses no longer sent are removed
+        """
+        service = UserService(session=session)
+        await service.create_user(user_data("defaults_one", (1, 2, 3)))
+
+        data = UserSchema(
+            username="defaults_one",
+            last_name="Tester",
+            addresses=[
+                dict(
+                    address_line_1="9 Elm Street",
+                    city="Chicago",
+                    state="IL",
+                    postal_code="60601",
+                ),
+                dict(
+                    type=2,
+                    address_line_1="1 Office Park",
+                    address_line_2="Suite 5",
+                    city="Springfield",
+                    state="IL",
+                    postal_code="62701",
+                ),
+            ],
+        ).model_dump()
+        await service.update_user(data)
+
+        session.expire_all()
+        user = await service.get_user(username="defaults_one")
+        assert sorted(
+            (address.type, address.address_line_1, address.address_line_2, address.city)
+            for address in user.addresses
+        ) == [
+            (1, "9 Elm Street", None, "Chicago"),
+            (2, "1 Office Park", "Suite 5", "Springfield"),
+        ]
+
+    async def test_create_user_without_reads(self, session):
+        """
+        GIVEN database is up and running
+        WHEN create user method is called
+        THEN the user and addresses are written with RETURNING and no lookup or
+        refresh query, and an existing username raises an exception
+        """
+        service = UserService(session=session)
+        with count_statements(session) as statements:
+            user = await service.create_user(user_data("returning_one"))
+        assert [statement.split()[0] for statement in statements] == [
+            "INSERT",
+            "INSERT",
+        ]
+        assert user.id is not None
+        assert user.create_date is not None
+        assert all(address.user_id == user.id for address in user.addresses)
+
+        with pytest.raises(UserAlreadyExistError):
+            await service.create_user(user_data("returning_one"))
+
+    async def test_get_user_detail_cache(self, session):
+        """
+        GIVEN database is up and running and the service has a cache
+        WHEN get user detail is called before and after the user is updated
+        THEN repeated reads are served from the cache without a query and the
+        update invalidates the cached user
+        """
+        cache = LRUCache(name="test-user-detail", ttl=30, max_size=10)
+        service = UserService(session=session, cache=cache)
+        await service.create_user(user_data("cached_one"))
+
+        assert await service.get_user_detail("cached_one") is not None
+        with count_statements(session) as statements:
+            user, modify_date = await service.get_user_detail("cached_one")
+        assert statements == []
+        assert user["username"] == "cached_one"
+        assert modify_date == await service.get_user_modify_date("cached_one")
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        data = user_data("cached_one", address_types=(3,))
+        await service.update_user(data)
+        user, _ = await service.get_user_detail("cached_one")
+        assert [address["type"] for address in user["addresses"]] == [3]
+        assert cache.misses == 2
+
+        assert await service.get_user_detail("cached_missing") is None
+        assert cache.stats()["size"] == 1
+
+    async def test_get_user_versions(self, session):
+        """
+        GIVEN database is up and running
+        WHEN get user versions is called for a page of users
+        THEN it returns the username and modify date of the page in one query
+        """
+        service = UserService(session=session)
+        await service.create_users([user_data(f"version_{i}") for i in range(3)])
+        users = await service.get_user(search="version_", limit=2)
+
+        with count_statements(session) as statements:
+            versions = await service.get_user_versions(search="version_", limit=2)
+        assert len(statements) == 1
+        assert versions == [(user.username, user.modify_date) for user in users]